@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Agent Ivy de reconnaissance de gestes, sans fenêtre.
+
+Les clients (tablettes, palettes pygame...) publient leurs traits sur le bus :
+
+    GestureStroke client=tablette1 points=120,80;124,83;131,90;...
+
+L'agent regroupe les traits d'un même client (séparés de moins de
+DELAI_MULTITRAIT en mode nuage), normalise les gestes terminés (au besoin
+dans un pool de processus), puis note tous les gestes en attente, tous clients confondus,
+en un seul appel numpy (recognizer.classer). Le résultat est publié au
+format attendu par le moteur de fusion :
+
+    Recognizer gesture=cercle score=0.931 client=tablette1
+
+    python agent_gestes.py [--bus 127.255.255.255:2010] [--reconnaisseur nuage]
+    python agent_gestes.py --bench 64     # lot contre geste par geste, sans Ivy
+
+Le nombre de processus est réglé par GESTES_TRAVAILLEURS. Par défaut (0),
+la normalisation reste dans le thread de l'agent : une normalisation coûte
+~0,3 ms, moins que la sérialisation vers un processus (voir --bench).
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from threading import Thread, Lock
+
+import numpy as np
+
+from gestes import RECOGNIZERS, StockModeles, simplifier, modeles_par_defaut, DELAI_MULTITRAIT
+
+# --- Constantes ---
+BUS = "127.255.255.255:2010"
+TRAVAILLEURS = int(os.environ.get("GESTES_TRAVAILLEURS", "0"))
+PERIODE_LOT = 0.02          # secondes entre deux lots
+LOT_MAX = 64                # gestes notés au plus par appel
+
+
+def lire_points(texte):
+    """ "x,y;x,y;..." -> [(x, y), ...]"""
+    points = []
+    for element in texte.split(";"):
+        x, _, y = element.partition(",")
+        try:
+            points.append((float(x), float(y)))
+        except ValueError:
+            continue
+    return points
+
+
+def normaliser(nom_recognizer, geste):
+    """Normalisation d'un geste (exécutée dans un processus du pool)"""
+    return RECOGNIZERS[nom_recognizer]().normalize(geste)
+
+
+class AgentGestes:
+    """Capture des traits par client et reconnaissance par lots
+
+    publier(message) envoie un résultat (send_msg d'Ivy, print...).
+    """
+
+    def __init__(self, nom_recognizer, publier, travailleurs=TRAVAILLEURS,
+                 periode=PERIODE_LOT, lot_max=LOT_MAX, modeles=None):
+        self.nom_recognizer = nom_recognizer
+        self.recognizer = RECOGNIZERS[nom_recognizer]()
+        (modeles or StockModeles()).charger(self.recognizer)
+        self.publier = publier
+        self.delai_geste = DELAI_MULTITRAIT if nom_recognizer == "nuage" else 0.0
+        self.periode = periode
+        self.lot_max = lot_max
+        self.travailleurs = travailleurs
+        self.pool = ProcessPoolExecutor(travailleurs) if travailleurs > 0 else None
+        self.traits = {}            # client -> [traits, heure du dernier trait]
+        self.verrou = Lock()
+        self.actif = False
+        self.thread = None
+        self.lots = 0
+        self.reconnus = 0
+
+    # --- Capture ---
+    def ajouter_trait(self, client, points, horodatage=None):
+        """Trait terminé d'un client, décimé comme dans code.py"""
+        points = simplifier(points)
+        if len(points) < 2:
+            return
+        with self.verrou:
+            en_cours = self.traits.setdefault(client, [[], 0.0])
+            en_cours[0].append(points)
+            en_cours[1] = horodatage or time.time()
+
+    def gestes_termines(self, maintenant=None):
+        """Retire et renvoie [(client, geste)] des gestes sans nouveau trait depuis delai_geste"""
+        maintenant = maintenant or time.time()
+        with self.verrou:
+            prets = [client for client, (_, fin) in self.traits.items()
+                     if maintenant - fin >= self.delai_geste][:self.lot_max]
+            gestes = [(client, self.traits.pop(client)[0]) for client in prets]
+        return [(client, traits if len(traits) > 1 else traits[0]) for client, traits in gestes]
+
+    # --- Reconnaissance ---
+    def reconnaitre(self, gestes):
+        """Normalise (pool) puis note tous les gestes d'un seul appel -> [(nom, score)]"""
+        if not gestes:
+            return []
+        if self.pool:
+            # Un paquet par processus : le coût des échanges ne dépend pas du nombre de gestes
+            paquet = -(-len(gestes) // self.travailleurs)
+            normalises = list(self.pool.map(normaliser, [self.nom_recognizer] * len(gestes), gestes,
+                                            chunksize=paquet))
+        else:
+            normalises = [self.recognizer.normalize(geste) for geste in gestes]
+        return self.recognizer.classer(np.stack(normalises))
+
+    def traiter_lot(self, lot):
+        resultats = self.reconnaitre([geste for _, geste in lot])
+        for (client, _), (nom, score) in zip(lot, resultats):
+            if nom:
+                self.publier(f"Recognizer gesture={nom} score={score:.3f} client={client}")
+        self.lots += 1
+        self.reconnus += len(lot)
+
+    def boucle(self):
+        while self.actif:
+            time.sleep(self.periode)
+            lot = self.gestes_termines()
+            if lot:
+                try:
+                    self.traiter_lot(lot)
+                except Exception as e:
+                    print(f"[Gestes] Lot de {len(lot)} gestes ignoré : {e}")
+
+    def demarrer(self):
+        self.actif = True
+        self.thread = Thread(target=self.boucle, daemon=True)
+        self.thread.start()
+
+    def arreter(self):
+        self.actif = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def lancer_ivy(agent, bus):
+    """Agent Ivy « GestureRecognizer » (ivy importé seulement ici)"""
+    from ivy.ivy import IvyServer
+    serveur = IvyServer(agent_name="GestureRecognizer")
+
+    def on_trait(src, client, points):
+        agent.ajouter_trait(client, lire_points(points))
+
+    serveur.bind_msg(on_trait, r'^GestureStroke client=(\S+) points=(\S+)')
+    agent.publier = serveur.send_msg
+    serveur.start(bus)
+    print(f"[Ivy] GestureRecognizer démarré sur {bus}")
+    return serveur
+
+
+def bench(n, nom_recognizer, travailleurs):
+    """Débit de reconnaissance de n gestes : un par un, puis en un lot"""
+    rng = np.random.default_rng(0)
+    modeles = list(modeles_par_defaut(RECOGNIZERS[nom_recognizer].MODELES_FERMES).values())
+    gestes = []
+    for i in range(n):
+        # Trait souris : ~200 points le long du modèle, bruités
+        sommets = np.asarray(modeles[i % len(modeles)]) * rng.uniform(0.5, 2.0)
+        t = np.linspace(0, len(sommets) - 1, 200)
+        points = np.stack([np.interp(t, np.arange(len(sommets)), sommets[:, k]) for k in (0, 1)], axis=1)
+        gestes.append([tuple(p) for p in np.round(points + rng.normal(0, 1, points.shape))])
+    agent = AgentGestes(nom_recognizer, print, travailleurs=travailleurs)
+    agent.reconnaitre(gestes[:2])       # démarrage du pool
+
+    debut = time.perf_counter()
+    unitaires = [agent.recognizer.recognize(geste) for geste in gestes]
+    unitaire = time.perf_counter() - debut
+    debut = time.perf_counter()
+    lot = agent.reconnaitre(gestes)
+    groupe = time.perf_counter() - debut
+    agent.arreter()
+
+    accord = sum(a == b for a, (b, _) in zip(unitaires, lot))
+    print(f"{nom_recognizer} : {n} gestes, {travailleurs} processus")
+    print(f"  geste par geste {unitaire * 1000:8.1f} ms ({unitaire / n * 1000:.2f} ms/geste)")
+    print(f"  en un lot       {groupe * 1000:8.1f} ms ({groupe / n * 1000:.2f} ms/geste)")
+    print(f"  mêmes classes   {accord}/{n}, score moyen {np.mean([s for _, s in lot]):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent Ivy de reconnaissance de gestes")
+    parser.add_argument("--bus", default=BUS)
+    parser.add_argument("--reconnaisseur", default=os.environ.get("RECONNAISSEUR", "dollar"),
+                        choices=list(RECOGNIZERS))
+    parser.add_argument("--travailleurs", type=int, default=TRAVAILLEURS)
+    parser.add_argument("--bench", type=int, default=0, metavar="N")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench, args.reconnaisseur, args.travailleurs)
+        return 0
+
+    agent = AgentGestes(args.reconnaisseur, print, travailleurs=args.travailleurs)
+    serveur = lancer_ivy(agent, args.bus)
+    agent.demarrer()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    agent.arreter()
+    serveur.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
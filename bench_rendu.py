@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark du rendu en fonction de la taille de la scène (driver SDL dummy).
+
+Trois implémentations de dessin sont mesurées sur des scènes synthétiques
+de formes mélangées :
+- fusion  : MultimodalPaletteApp.dessiner (fond en cache, statut) ; les
+            modifications et la publication de la scène, faites par le thread
+            de fusion dans l'application, ne sont pas chronométrées
+- code    : boucle de code.py (toutes les formes redessinées à chaque frame)
+- palette : boucle de palette.py (fond en cache, forme suivie)
+
+Scénarios : idle (scène immobile), drag (une forme suit le pointeur),
+creation (rafale de CREATION_PAR_FRAME formes par frame). Les percentiles du
+temps de frame sont écrits en JSON pour comparer les stratégies de rendu.
+
+    python bench_rendu.py [--tailles 100,1000,10000,100000] [--sortie bench_rendu.json]
+                          [--budget-ms 16.7 --budget-jusqua 1000]
+
+Avec --budget-ms, le code de sortie vaut 1 si le p95 d'une mesure dépasse
+le budget (pour les scènes jusqu'à --budget-jusqua formes).
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import importlib.util
+from contextlib import redirect_stdout
+
+import pygame
+
+from profileur import percentile
+from memoire import memoire
+
+# --- Constantes ---
+TAILLES = [100, 1000, 10000, 100000]
+SCENARIOS = ["idle", "drag", "creation"]
+FRAMES = 60
+COUT_MAX_FRAMES = 2000000   # formes dessinées au plus par mesure (frames réduites au-delà)
+CREATION_PAR_FRAME = 10
+TYPES = ["CIRCLE", "RECTANGLE", "TRIANGLE", "DIAMOND"]
+COULEURS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+
+
+def charger_module(nom, fichier):
+    """Importe code.py / palette.py par chemin (code.py masque le module standard code)"""
+    spec = importlib.util.spec_from_file_location(nom, os.path.join(os.path.dirname(os.path.abspath(__file__)), fichier))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def specs_aleatoires(n, rng, largeur=800, hauteur=600):
+    return [(TYPES[i % len(TYPES)], rng.randrange(largeur), rng.randrange(60, hauteur), rng.choice(COULEURS))
+            for i in range(n)]
+
+
+def nombre_frames(n):
+    return max(5, min(FRAMES, COUT_MAX_FRAMES // max(n, 1)))
+
+
+def mesurer(frame, frames, preparer=None):
+    """Appelle frame(k) puis flip, renvoie les durées en ms (première frame exclue)
+
+    preparer(k), non chronométré, simule le travail fait hors du thread de rendu.
+    """
+    durees = []
+    for k in range(frames + 1):
+        if preparer:
+            preparer(k)
+        debut = time.perf_counter()
+        frame(k)
+        pygame.display.flip()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return durees[1:]
+
+
+# --- Implémentations ---
+def bench_fusion(n, scenario, rng):
+    app = BENCH_APP
+    controller = app.controller
+    with redirect_stdout(io.StringIO()):
+        controller.delete_many([forme.id for forme in controller.formes])
+        controller.create_many(specs_aleatoires(n, rng))
+        controller.publier_scene()
+    app.dragging, app.dragged_forme = False, None
+
+    if scenario == "drag":
+        forme = controller.formes[0]
+        app.dragging, app.dragged_forme = True, controller.scene.index[forme.id]
+
+    def preparer(k):
+        # Travail du thread de fusion : modification puis publication de la scène
+        with redirect_stdout(io.StringIO()):
+            if scenario == "drag":
+                controller.drag_forme(forme, (100 + k % 600, 100 + k % 400))
+            elif scenario == "creation":
+                controller.create_many(specs_aleatoires(CREATION_PAR_FRAME, rng))
+            controller.publier_scene()
+
+    return mesurer(lambda k: app.dessiner(controller.scene), nombre_frames(n), preparer)
+
+
+def bench_code(n, scenario, rng):
+    module = CODE
+    formes = [module.FORMES[t](x, y, c)
+              for t, x, y, c in specs_aleatoires(n, rng)]
+    screen = pygame.display.get_surface()
+
+    def frame(k):
+        if scenario == "drag":
+            formes[0].set_location(100 + k % 600, 100 + k % 400)
+        elif scenario == "creation":
+            formes.extend(module.FORMES[t](x, y, c)
+                          for t, x, y, c in specs_aleatoires(CREATION_PAR_FRAME, rng))
+        screen.fill(module.WHITE)
+        for f in formes:
+            f.draw(screen)
+
+    return mesurer(frame, nombre_frames(n))
+
+
+def bench_palette(n, scenario, rng):
+    module = PALETTE
+    from rendu import RenduCalques
+    formes = [module.FORMES[t](x, y, c)
+              for t, x, y, c in specs_aleatoires(n, rng)]
+    screen = pygame.display.get_surface()
+    # Même rendu que palette.py : fond indexé sur ses couleurs, zones modifiées seulement
+    rendu = RenduCalques(screen.get_size(), module.WHITE, couleurs=module.COLORS.values(), regions=True)
+    selection = formes[0] if scenario == "drag" else None
+
+    def frame(k):
+        if selection:
+            selection.set_location(100 + k % 600, 100 + k % 400)
+        elif scenario == "creation":
+            formes.extend(module.FORMES[t](x, y, c)
+                          for t, x, y, c in specs_aleatoires(CREATION_PAR_FRAME, rng))
+        mobiles = [selection] if selection else []
+        rendu.composer(screen, formes, (len(formes), id(selection)), map(id, mobiles))
+        for f in mobiles:
+            rendu.marquer(f.draw(screen))
+
+    return mesurer(frame, nombre_frames(n))
+
+
+IMPLEMENTATIONS = {"fusion": bench_fusion, "code": bench_code, "palette": bench_palette}
+
+
+def resumer(durees):
+    return {
+        "frames": len(durees),
+        "moyenne_ms": round(sum(durees) / len(durees), 3),
+        "p50_ms": round(percentile(durees, 50), 3),
+        "p95_ms": round(percentile(durees, 95), 3),
+        "p99_ms": round(percentile(durees, 99), 3),
+        "max_ms": round(max(durees), 3),
+        "fps": round(1000 / (sum(durees) / len(durees)), 1),
+    }
+
+
+def main():
+    global BENCH_APP, CODE, PALETTE
+    parser = argparse.ArgumentParser(description="Benchmark du rendu (driver SDL dummy)")
+    parser.add_argument("--tailles", default=",".join(map(str, TAILLES)))
+    parser.add_argument("--implementations", default=",".join(IMPLEMENTATIONS))
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--sortie", default="bench_rendu.json")
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--budget-jusqua", type=int, default=max(TAILLES))
+    parser.add_argument("--graine", type=int, default=0)
+    args = parser.parse_args()
+    tailles = [int(t) for t in args.tailles.split(",")]
+    implementations = args.implementations.split(",")
+    scenarios = args.scenarios.split(",")
+    sortie = os.path.abspath(args.sortie)
+
+    # Journal de la palette de fusion dans un dossier temporaire
+    os.chdir(tempfile.mkdtemp(prefix="bench_rendu_"))
+    # Scènes de la taille demandée, même si MEMOIRE_PLAFONDS plafonne les formes
+    memoire.plafonds["formes"] = 0
+    import fusion
+    BENCH_APP = fusion.MultimodalPaletteApp()
+    CODE = charger_module("bench_code", "code.py")
+    PALETTE = charger_module("bench_palette", "palette.py")
+
+    resultats = []
+    depassements = []
+    for implementation in implementations:
+        for n in tailles:
+            for scenario in scenarios:
+                durees = IMPLEMENTATIONS[implementation](n, scenario, random.Random(args.graine))
+                resultat = {"implementation": implementation, "scenario": scenario, "formes": n,
+                            **resumer(durees)}
+                resultats.append(resultat)
+                print(f"{implementation:8s} {scenario:9s} {n:7d} formes : p50 {resultat['p50_ms']:8.2f} ms  "
+                      f"p95 {resultat['p95_ms']:8.2f} ms  ({resultat['fps']:.0f} fps)")
+                if args.budget_ms and n <= args.budget_jusqua and resultat["p95_ms"] > args.budget_ms:
+                    depassements.append(resultat)
+
+    with open(sortie, "w") as f:
+        json.dump({"driver": os.environ["SDL_VIDEODRIVER"], "pygame": pygame.version.ver,
+                   "budget_ms": args.budget_ms, "resultats": resultats}, f, indent=2)
+    print(f"Résultats écrits dans {sortie}")
+
+    BENCH_APP.controller.arreter()
+    if depassements:
+        for r in depassements:
+            print(f"[Budget] {r['implementation']} {r['scenario']} {r['formes']} formes : "
+                  f"p95 {r['p95_ms']:.2f} ms > {args.budget_ms:.2f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
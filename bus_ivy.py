@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Transport Ivy du moteur de fusion (importé seulement si Ivy est utilisé)"""
+
+import os
+import time
+
+from ivy.ivy import IvyServer
+
+# --- Constantes ---
+# Score minimal d'un geste (0 : tous acceptés) ; en dessous il n'atteint pas le contrôleur
+SEUIL_GESTE = float(os.environ.get("SEUIL_GESTE", "0"))
+
+
+# --- Ivy Listener ---
+class IvyListener(IvyServer):
+    def __init__(self, queue, seuil_geste=SEUIL_GESTE, index=None):
+        super().__init__(agent_name="FusionEngine")
+        self.queue = queue
+        self.index = index  # IndexScene (requetes.py) des requêtes FusionQuery
+        self.seuil_geste = seuil_geste
+        self.gestes_rejetes = 0
+
+        # Messages SRA5 (reconnaissance vocale) - format exact du bus
+        # Format: sra5 Parsed=action=CREATE where=THIS form=CIRCLE color=RED localisation=THERE
+        self.bind_msg(self.on_sra5_message, r'^sra5 Parsed=action=(\w+) where=([^ ]*) form=(\w+) color=(\w+)(?: localisation=([^ ]*))?.*')
+
+        # Messages du recognizer de gestes (agent_gestes.py ajoute client=...)
+        self.bind_msg(self.on_gesture_message, r'^Recognizer gesture=(\S+) score=(\S+)')
+
+        # Commandes par lot : FusionBatch create CIRCLE,100,200,RED;... (voir fusion.lire_lot)
+        self.bind_msg(self.on_batch_message, r'^FusionBatch (\w+) ?(.*)')
+
+        # Demande d'instantané complet de la scène (miroir arrivé en retard)
+        self.bind_msg(self.on_sync_request, r'^FusionScene sync')
+
+        # Requêtes sur la scène : FusionQuery id=7 count type=CIRCLE (voir requetes.py)
+        self.bind_msg(self.on_query, r'^FusionQuery id=(\S+) (\w+) ?(.*)')
+
+    def on_sra5_message(self, src, action, where, form, color, localisation=None):
+        """Traite les messages de reconnaissance vocale SRA5"""
+        msg = {
+            "action": action if action != "none" else None,
+            "pointage": where if where not in ("none", "undefined", "") else None,
+            "form": form if form != "none" else None,
+            "color": color if color != "none" else None,
+            "localisation": localisation if localisation not in (None, "", "none", "undefined") else None,
+        }
+        print(f"[Ivy SRA5] Received: {msg}")
+
+        # Convertir en format texte pour process_speech
+        parts = []
+        if msg["action"]:
+            parts.append(f"action={msg['action']}")
+        if msg["pointage"]:
+            parts.append(f"pointage={msg['pointage']}")
+        if msg["form"]:
+            parts.append(f"form={msg['form']}")
+        if msg["color"]:
+            parts.append(f"color={msg['color']}")
+        if msg["localisation"]:
+            parts.append(f"localisation={msg['localisation']}")
+
+        parsed_text = " ".join(parts)
+        # Horodatage de réception : sert à retrouver la position du pointeur
+        # au moment où le déictique a été prononcé
+        self.queue.put(('speech', parsed_text, time.time()))
+
+    def on_gesture_message(self, src, gesture, score):
+        """Traite les messages de reconnaissance gestuelle"""
+        try:
+            valeur = float(score)
+        except ValueError:
+            valeur = None
+        if valeur is not None and valeur < self.seuil_geste:
+            self.gestes_rejetes += 1
+            print(f"[Ivy] Gesture ignored: {gesture} (score {valeur:.3f} < {self.seuil_geste})")
+            return
+        print(f"[Ivy] Gesture received: {gesture} (score: {score})")
+        self.queue.put(('gesture', gesture))
+
+    def on_batch_message(self, src, op, payload):
+        """Lot d'opérations appliqué atomiquement par le contrôleur"""
+        self.queue.put(('batch', (op, payload)))
+
+    def on_sync_request(self, src):
+        """Un miroir demande l'état complet de la scène"""
+        self.queue.put(('sync', None))
+
+    def on_query(self, src, requete_id, op, arguments):
+        """Requête servie depuis l'index, dans le thread d'Ivy (ni fusion ni affichage)"""
+        if self.index:
+            self.send_msg(self.index.repondre(requete_id, op, arguments))
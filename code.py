@@ -1,16 +1,20 @@
+from demarrage import chrono, init_pygame
+
 import pygame
+import os
 import sys
+import time
 import threading
 import unicodedata
-import math
-from queue import Queue
-import speech_recognition as sr
+from grammaire import get_matcher
+from ecoute import creer_backend
+from gestes import RECOGNIZERS, StockModeles, SimplificateurTrait, DELAI_MULTITRAIT
+from profileur import profileur
+from memoire import memoire, FileBornee
 
 # ------------------------------
 # CONFIGURATION
 # ------------------------------
-pygame.init()
-
 WIDTH, HEIGHT = 800, 600
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -35,6 +39,17 @@ ETAT_ATTENTE = "ATTENTE"
 ETAT_DEPLACEMENT = "DEPLACEMENT"
 ETAT_ATTENTE_CREATION = "ATTENTE_CREATION"
 
+# Recognizer de gestes : "dollar" ($1, un trait) ou "nuage" ($P, multi-traits)
+RECONNAISSEUR = os.environ.get("RECONNAISSEUR", "dollar")
+
+# Touches pour enregistrer le dernier tracé comme nouveau modèle
+TOUCHES_MODELES = {
+    pygame.K_c: "cercle",
+    pygame.K_r: "rectangle",
+    pygame.K_t: "triangle",
+    pygame.K_l: "losange"
+}
+
 # ------------------------------
 # OUTILS
 # ------------------------------
@@ -103,72 +118,49 @@ class Losange(Forme):
         ]
         pygame.draw.polygon(screen, self.color, points)
 
+# Valeurs sémantiques de la grammaire SRA5 -> classes et couleurs de la palette
+FORMES = {"CIRCLE": Cercle, "RECTANGLE": Rectangle, "TRIANGLE": Triangle, "DIAMOND": Losange}
+matcher = get_matcher()
+COULEURS_SRA5 = {matcher.valeur("couleur", nom): col for nom, col in COLORS.items()}
+
 # ------------------------------
 # ÉCOUTE VOCALE
 # ------------------------------
-def ecouter_thread(queue):
-    recognizer = sr.Recognizer()
+def ecouter_thread(queue, backend=None):
+    # Backend choisi par PAROLE_BACKEND (google, local, rejeu:fichier)
     try:
-        with sr.Microphone() as source:
-            while True:
-                try:
-                    audio = recognizer.listen(source, timeout=1, phrase_time_limit=3)
-                    txt = recognizer.recognize_google(audio, language="fr-FR")
-                    queue.put(normaliser(txt))
-                except:
-                    pass
-    except:
-        pass
+        backend = backend or creer_backend()
+        for phrase in backend.phrases():
+            if phrase.texte:
+                queue.put(normaliser(phrase.texte))
+    except Exception as e:
+        print(f"[Ecoute] Arrêt de l'écoute : {e}")
+
+# Backends actifs, arrêtés à la fermeture (processus d'écoute avec PAROLE_PROCESSUS=1)
+ecoutes = []
+
+def demarrer_ecoute(queue):
+    # Création du backend (import speech_recognition / modèle Vosk) hors du thread pygame
+    try:
+        backend = creer_backend()
+    except Exception as e:
+        print(f"[Ecoute] Écoute indisponible : {e}")
+        return
+    ecoutes.append(backend)
+    t = threading.Thread(target=ecouter_thread, args=(queue, backend))
+    t.daemon = True
+    t.start()
 
-# ------------------------------
-# $1 Recognizer minimal
-# ------------------------------
-class DollarOneRecognizer:
-    def __init__(self):
-        self.templates = {}
-    
-    def add_template(self, name, points):
-        self.templates[name] = self.resample(points)
-    
-    def resample(self, points, n=64):
-        if len(points) < 2:
-            return points
-        total_len = sum(math.dist(points[i], points[i+1]) for i in range(len(points)-1))
-        D = total_len / (n-1)
-        new_points = [points[0]]
-        d = 0
-        for i in range(1, len(points)):
-            dist = math.dist(points[i-1], points[i])
-            if (d + dist) >= D:
-                t = (D - d) / dist
-                x = points[i-1][0] + t*(points[i][0]-points[i-1][0])
-                y = points[i-1][1] + t*(points[i][1]-points[i-1][1])
-                new_points.append((x, y))
-                points.insert(i, (x, y))
-                d = 0
-            else:
-                d += dist
-        while len(new_points) < n:
-            new_points.append(points[-1])
-        return new_points
-
-    def recognize(self, points):
-        points = self.resample(points)
-        best_score = float('inf')
-        best_name = None
-        for name, template in self.templates.items():
-            score = sum(math.dist(points[i], template[i]) for i in range(len(points)))
-            if score < best_score:
-                best_score = score
-                best_name = name
-        return best_name
+chrono.etape("imports")
 
 # ------------------------------
 # PROGRAMME PRINCIPAL
 # ------------------------------
 def main():
+    init_pygame()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Palette + $1 Recognizer + Voice")
+    chrono.etape("fenêtre")
 
     forme_courante = None
     couleur_originale = None
@@ -185,20 +177,33 @@ def main():
 
     drawing = False
     drawing_points = []
-
-    commande_queue = Queue()
-    t = threading.Thread(target=ecouter_thread, args=(commande_queue,))
-    t.daemon = True
-    t.start()
-
-    recognizer = DollarOneRecognizer()
-    recognizer.add_template("cercle", [(math.cos(t)*50+400, math.sin(t)*50+300) for t in [i*2*math.pi/32 for i in range(32)]])
-    recognizer.add_template("rectangle", [(350,250),(450,250),(450,350),(350,350)])
-    recognizer.add_template("triangle", [(400,250),(450,350),(350,350)])
-    recognizer.add_template("losange", [(400,250),(450,300),(400,350),(350,300)])
+    simplificateur = SimplificateurTrait()  # décimation des points souris pendant le tracé
+
+    # Phrases en attente : au-delà du plafond, les plus anciennes sont perdues
+    commande_queue = FileBornee("commandes_vocales")
+    chrono.lancer("micro", demarrer_ecoute, commande_queue)
+
+    # Modèles déjà normalisés, relus depuis modeles_gestes/dollar/ (ou nuage/)
+    recognizer = RECOGNIZERS[RECONNAISSEUR]()
+    modeles = StockModeles()
+    modeles.charger(recognizer)
+    dernier_trait = []
+    chrono.etape("modèles gestes")
+
+    # Traits d'un même geste (séparés de moins de DELAI_MULTITRAIT en mode nuage)
+    traits_geste = []
+    fin_trait = 0
+    delai_geste = DELAI_MULTITRAIT if RECONNAISSEUR == "nuage" else 0
+
+    # Structures suivies par le rapport mémoire (F6)
+    memoire.surveiller("formes", lambda: len(formes))
+    memoire.surveiller("trait_en_cours", lambda: len(drawing_points))
+    memoire.surveiller("traits_geste", lambda: len(traits_geste))
+    memoire.suivre()
 
     running = True
     while running:
+        profileur.fin_frame()
         screen.fill(WHITE)
         current_mouse_pos = pygame.mouse.get_pos()
 
@@ -214,6 +219,7 @@ def main():
                 pygame.draw.rect(screen, BLACK, rect, 3)
             palette_rects[nom] = rect
             x_offset += COLOR_BOX_SIZE + COLOR_MARGIN
+        profileur.etape('palette')
 
         # ------------------------------
         # Événements souris
@@ -232,31 +238,60 @@ def main():
 
                 if not clicked_on_palette and event.pos[1] > PALETTE_HEIGHT:
                     drawing = True
-                    drawing_points = [event.pos]
+                    simplificateur = SimplificateurTrait()
+                    simplificateur.ajouter(event.pos)
+                    drawing_points = simplificateur.trait()
 
             elif event.type == pygame.MOUSEMOTION and drawing:
-                drawing_points.append(event.pos)
+                simplificateur.ajouter(event.pos)
+                drawing_points = simplificateur.trait()
+
+            elif event.type == pygame.KEYDOWN and event.key in TOUCHES_MODELES:
+                if dernier_trait:
+                    modeles.enregistrer(recognizer, TOUCHES_MODELES[event.key], dernier_trait)
+                    print(f"Modèle {TOUCHES_MODELES[event.key]} enregistré.")
+
+            elif event.type == pygame.KEYDOWN:
+                # F3 : overlay du profileur, F4 : export CSV, F6 : rapport mémoire
+                profileur.gerer_touche(event.key) or memoire.gerer_touche(event.key)
 
             elif event.type == pygame.MOUSEBUTTONUP and drawing:
                 drawing = False
-                if len(drawing_points) > 1:
-                    if etat == ETAT_ATTENTE_CREATION:
-                        # Reconnaissance de la forme mais on ne crée pas l'objet encore
-                        creation_shape_name = recognizer.recognize(drawing_points)
-                        creation_points = drawing_points.copy()
-                        creation_attend_couleur = True
-                        print("Forme dessinée, dis la couleur.")
-                    else:
-                        # création normale directement
-                        shape_name = recognizer.recognize(drawing_points)
-                        xs = [p[0] for p in drawing_points]
-                        ys = [p[1] for p in drawing_points]
-                        center = (sum(xs)//len(xs), sum(ys)//len(ys))
+                if len(drawing_points) > 1 and not memoire.plein("traits_geste", len(traits_geste)):
+                    traits_geste.append(drawing_points.copy())
+                    fin_trait = time.time()
+        profileur.etape('evenements')
 
-                        if shape_name == "cercle": formes.append(Cercle(*center, couleur_courante))
-                        elif shape_name == "rectangle": formes.append(Rectangle(*center, couleur_courante))
-                        elif shape_name == "triangle": formes.append(Triangle(*center, couleur_courante))
-                        elif shape_name == "losange": formes.append(Losange(*center, couleur_courante))
+        # ------------------------------
+        # Geste terminé (pas de nouveau trait depuis delai_geste)
+        # ------------------------------
+        if traits_geste and not drawing and time.time() - fin_trait >= delai_geste:
+            geste = traits_geste if len(traits_geste) > 1 else traits_geste[0]
+            points_geste = [p for trait in traits_geste for p in trait]
+            traits_geste = []
+            dernier_trait = geste
+            if etat == ETAT_ATTENTE_CREATION:
+                # Reconnaissance de la forme mais on ne crée pas l'objet encore
+                with profileur.phase('reconnaissance'):
+                    creation_shape_name = recognizer.recognize(geste)
+                creation_points = points_geste
+                creation_attend_couleur = True
+                print("Forme dessinée, dis la couleur.")
+            else:
+                # création normale directement
+                with profileur.phase('reconnaissance'):
+                    shape_name = recognizer.recognize(geste)
+                xs = [p[0] for p in points_geste]
+                ys = [p[1] for p in points_geste]
+                center = (sum(xs)//len(xs), sum(ys)//len(ys))
+                if memoire.plein("formes", len(formes)):
+                    shape_name = None  # plafond atteint : le geste ne crée rien
+
+                if shape_name == "cercle": formes.append(Cercle(*center, couleur_courante))
+                elif shape_name == "rectangle": formes.append(Rectangle(*center, couleur_courante))
+                elif shape_name == "triangle": formes.append(Triangle(*center, couleur_courante))
+                elif shape_name == "losange": formes.append(Losange(*center, couleur_courante))
+        profileur.etape('gestes')
 
         # ------------------------------
         # Commandes vocales
@@ -267,26 +302,21 @@ def main():
             if speech:
                 print("Commande vocale :", speech)
 
-                # Création vocale normale
-                if any(f in speech for f in ["cercle", "rectangle", "triangle", "losange"]) and etat != ETAT_ATTENTE_CREATION:
-                    pos = current_mouse_pos if "ici" in speech else (WIDTH//2, HEIGHT//2)
-
-                    if "cercle" in speech: forme = Cercle(*pos)
-                    elif "rectangle" in speech: forme = Rectangle(*pos)
-                    elif "triangle" in speech: forme = Triangle(*pos)
-                    elif "losange" in speech: forme = Losange(*pos)
-
-                    for nom, col in COLORS.items():
-                        if nom in speech:
-                            forme.set_color(col)
-                            break
-                    else:
-                        forme.set_color(couleur_courante)
+                # Analyse en un seul passage (vocabulaire de la grammaire SRA5)
+                commande = matcher.match(speech)
+                action = commande["action"]
+                ici = commande["localisation"] == "THERE"
 
+                # Création vocale normale
+                if commande["form"] in FORMES and etat != ETAT_ATTENTE_CREATION \
+                        and not memoire.plein("formes", len(formes)):
+                    pos = current_mouse_pos if ici else (WIDTH//2, HEIGHT//2)
+                    forme = FORMES[commande["form"]](*pos)
+                    forme.set_color(COULEURS_SRA5.get(commande["color"], couleur_courante))
                     formes.append(forme)
 
                 # Nouvelle fonctionnalité : "créé un"
-                if "créé un" in speech or "crée un" in speech or "creer un" in speech or "creer" in speech or "dessine un" in speech or "dessine" in speech:
+                if action == "CREATE":
                     etat = ETAT_ATTENTE_CREATION
                     drawing_points = []
                     creation_points = []
@@ -300,18 +330,14 @@ def main():
                 if etat == ETAT_ATTENTE_CREATION and creation_shape_name:
                     if creation_attend_couleur:
                         # On attend la couleur
-                        for nom, col in COLORS.items():
-                            if nom in speech:
-                                couleur_choisie = col
-                                creation_attend_couleur = False
-                                print(f"Couleur {nom} choisie. Dites 'ici' pour placer la forme.")
-                                break
+                        if commande["color"] in COULEURS_SRA5:
+                            couleur_choisie = COULEURS_SRA5[commande["color"]]
+                            creation_attend_couleur = False
+                            print(f"Couleur {commande['color']} choisie. Dites 'ici' pour placer la forme.")
                     else:
                         # On attend le "ici"
-                        if "ici" in speech:
+                        if ici:
                             # Créer réellement la forme avec couleur et position
-                            xs = [p[0] for p in creation_points]
-                            ys = [p[1] for p in creation_points]
                             center = current_mouse_pos
 
                             if creation_shape_name == "cercle": creation_forme = Cercle(*center, couleur_choisie)
@@ -319,7 +345,8 @@ def main():
                             elif creation_shape_name == "triangle": creation_forme = Triangle(*center, couleur_choisie)
                             elif creation_shape_name == "losange": creation_forme = Losange(*center, couleur_choisie)
 
-                            formes.append(creation_forme)
+                            if not memoire.plein("formes", len(formes)):
+                                formes.append(creation_forme)
 
                             # Réinitialisation
                             creation_points = []
@@ -330,36 +357,46 @@ def main():
                             print("Forme créée et placée !")
 
                 # Déplacement en 2 temps
-                if "deplace ca" in speech or "déplace ça" in speech or "des places" in speech or "des places ca" in speech or "des places ca" in speech or "bouge ca" in speech or "bouge" in speech:
+                if action == "MOVE":
                     if formes:
                         forme_courante = min(formes, key=lambda f: f.distance_to(current_mouse_pos))
                         couleur_originale = forme_courante.color
                         forme_courante.set_color(assombrir(couleur_originale))
                         etat = ETAT_DEPLACEMENT
 
-                if etat == ETAT_DEPLACEMENT and "ici" in speech:
+                if etat == ETAT_DEPLACEMENT and ici:
                     forme_courante.set_location(*current_mouse_pos)
                     forme_courante.set_color(couleur_originale)
                     forme_courante = None
                     etat = ETAT_ATTENTE
 
-                if "quitter" in speech:
+                if action == "QUIT":
                     running = False
+        profileur.etape('commandes')
 
         # ------------------------------
         # Dessin temporaire
         # ------------------------------
+        for trait in traits_geste:
+            pygame.draw.lines(screen, couleur_courante, False, trait, 3)
         if drawing and len(drawing_points) > 1:
             pygame.draw.lines(screen, couleur_courante, False, drawing_points, 3)
+        profileur.etape('traits')
 
         # ------------------------------
         # Affichage des formes
         # ------------------------------
         for f in formes:
             f.draw(screen)
+        profileur.dessiner(screen)
+        profileur.etape('formes')
 
         pygame.display.flip()
+        profileur.etape('flip')
+        chrono.premiere_frame()
 
+    for backend in ecoutes:
+        backend.arreter()
     pygame.quit()
     sys.exit()
 
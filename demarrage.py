@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Mesure du démarrage et initialisation paresseuse des sous-systèmes.
+
+Chaque point d'entrée importe ce module en premier puis marque ses étapes
+(imports, pygame, fenêtre, modèles...). Les sous-systèmes lents (Ivy, micro)
+démarrent en arrière-plan et sont mesurés séparément. Avec PROFIL_DEMARRAGE=1
+le détail est affiché à la première frame :
+
+    [Démarrage] imports              84.0 ms
+    [Démarrage] pygame               41.2 ms
+    [Démarrage] première frame      160.3 ms (total)
+    [Démarrage] ivy (arrière-plan)  230.1 ms
+"""
+
+import os
+import time
+from threading import Thread, Lock
+
+PROFIL = os.environ.get("PROFIL_DEMARRAGE", "0") not in ("", "0")
+
+
+class ChronoDemarrage:
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.dernier = self.debut
+        self.etapes = []            # (nom, durée en s)
+        self.arriere_plan = []      # (nom, durée en s)
+        self.premiere = None        # instant de la première frame
+        self.verrou = Lock()
+
+    def etape(self, nom):
+        """Clôt l'étape courante (durée depuis la marque précédente)"""
+        maintenant = time.perf_counter()
+        self.etapes.append((nom, maintenant - self.dernier))
+        self.dernier = maintenant
+
+    def lancer(self, nom, fonction, *args):
+        """Exécute fonction dans un thread démon et mesure sa durée"""
+        def executer():
+            debut = time.perf_counter()
+            try:
+                fonction(*args)
+            finally:
+                self.terminer(nom, time.perf_counter() - debut)
+        thread = Thread(target=executer, daemon=True)
+        thread.start()
+        return thread
+
+    def terminer(self, nom, duree):
+        with self.verrou:
+            self.arriere_plan.append((nom, duree))
+            deja_affiche = self.premiere is not None
+        if PROFIL and deja_affiche:
+            print(f"[Démarrage] {nom + ' (arrière-plan)':28s} {duree * 1000:8.1f} ms")
+
+    def premiere_frame(self):
+        """À appeler après chaque flip : ne fait quelque chose que la première fois"""
+        if self.premiere is not None:
+            return
+        self.etape("première frame")
+        with self.verrou:
+            self.premiere = time.perf_counter()
+        if PROFIL:
+            print(self.rapport())
+
+    def rapport(self):
+        lignes = [f"[Démarrage] {nom:28s} {duree * 1000:8.1f} ms" for nom, duree in self.etapes]
+        if self.premiere is not None:
+            lignes.append(f"[Démarrage] {'time-to-first-frame':28s} {(self.premiere - self.debut) * 1000:8.1f} ms (total)")
+        with self.verrou:
+            for nom, duree in self.arriere_plan:
+                lignes.append(f"[Démarrage] {nom + ' (arrière-plan)':28s} {duree * 1000:8.1f} ms")
+        return "\n".join(lignes)
+
+
+# Chronomètre du processus (créé au premier import)
+chrono = ChronoDemarrage()
+
+
+def init_pygame(font=False):
+    """Initialise uniquement les modules pygame utilisés (display, font)"""
+    import pygame
+    pygame.display.init()
+    if font:
+        pygame.font.init()
+    chrono.etape("pygame")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Diffusion des changements de la scène sur le bus Ivy.
+
+Chaque mutation du DialogueController est publiée sous forme d'un message
+delta numéroté ; un instantané complet est publié périodiquement (et sur
+demande) pour que les miroirs arrivés en retard se resynchronisent :
+
+    FusionScene seq=12 create id=3 type=CIRCLE x=120 y=300 color=ff0000
+    FusionScene seq=13 move id=3 x=130 y=310
+    FusionScene seq=14 delete id=3
+    FusionScene seq=15 clear
+    FusionScene seq=16 snapshot n=1 shapes=3,CIRCLE,130,310,ff0000
+    FusionScene seq=17 move_many n=2 shapes=3,140,320;4,10,10
+
+Un lot (create_many, move_many, recolour_many, delete_many) est publié en
+un seul message.
+
+Les mouvements de drag sont regroupés par forme et publiés au plus
+FREQUENCE_MAX fois par seconde : la bande passante suit le changement,
+pas la taille de la scène. « FusionScene sync » demande un instantané
+immédiat (relayé par le DialogueController). Un miroir ignore tout delta
+dont seq est inférieur ou égal à celui du dernier instantané reçu.
+
+Les instantanés sont toujours pris dans le thread de fusion (notification
+'sync'), comme les deltas : les périodiques sont demandés par un message
+('sync', None) dans la file du contrôleur. Un instantané pris ailleurs
+pourrait copier la liste des formes avant un delta déjà numéroté et
+perdre cette forme chez les miroirs.
+"""
+
+import time
+from threading import Thread, Lock
+
+# --- Constantes ---
+PREFIXE = "FusionScene"
+FREQUENCE_MAX = 20          # publications de drag par seconde
+INTERVALLE_SNAPSHOT = 5.0   # secondes entre deux instantanés complets
+
+
+def couleur_hex(color):
+    return "%02x%02x%02x" % tuple(int(c) for c in color[:3])
+
+
+def decrire(forme):
+    """Forme compacte : id,type,x,y,couleur"""
+    return f"{forme.id},{forme.get_type()},{int(forme.x)},{int(forme.y)},{couleur_hex(forme.color)}"
+
+
+class DiffuseurScene:
+    """Observateur du DialogueController qui publie les deltas de la scène"""
+
+    def __init__(self, controller, envoyer, frequence_max=FREQUENCE_MAX,
+                 intervalle_snapshot=INTERVALLE_SNAPSHOT):
+        self.controller = controller
+        self.envoyer = envoyer              # ex. IvyServer.send_msg
+        self.periode = 1.0 / frequence_max
+        self.intervalle_snapshot = intervalle_snapshot
+        self.seq = 0
+        self.verrou = Lock()
+        self.drags_en_attente = {}          # id -> forme (dernière position)
+        self.dernier_snapshot = 0.0
+        self.seq_snapshot = None            # seq du dernier instantané publié
+        self.sync_demande = False           # ('sync', None) en attente dans la file du contrôleur
+        self.actif = True
+        controller.ajouter_observateur(self.on_changement)
+        Thread(target=self.boucle, daemon=True).start()
+
+    def publier(self, message):
+        """Numérote et envoie un message (appelé avec self.verrou)"""
+        self.seq += 1
+        self.envoyer(f"{PREFIXE} seq={self.seq} {message}")
+
+    def on_changement(self, op, forme=None):
+        if op == 'sync':
+            self.snapshot()
+            return
+        with self.verrou:
+            if op == 'drag':
+                self.drags_en_attente[forme.id] = forme
+                return
+            if forme is not None and not isinstance(forme, list):
+                # La position finale remplace un drag encore en attente
+                self.drags_en_attente.pop(forme.id, None)
+            if op == 'create':
+                self.publier(f"create id={forme.id} type={forme.get_type()} "
+                             f"x={int(forme.x)} y={int(forme.y)} color={couleur_hex(forme.color)}")
+            elif op == 'move':
+                self.publier(f"move id={forme.id} x={int(forme.x)} y={int(forme.y)}")
+            elif op == 'delete':
+                self.publier(f"delete id={forme.id}")
+            elif op == 'create_many':
+                self.publier(f"create_many n={len(forme)} shapes=" + ";".join(decrire(f) for f in forme))
+            elif op in ('move_many', 'recolour_many', 'delete_many'):
+                for f in forme:
+                    self.drags_en_attente.pop(f.id, None)
+                if op == 'move_many':
+                    elements = (f"{f.id},{int(f.x)},{int(f.y)}" for f in forme)
+                elif op == 'recolour_many':
+                    elements = (f"{f.id},{couleur_hex(f.color)}" for f in forme)
+                else:
+                    elements = (str(f.id) for f in forme)
+                self.publier(f"{op} n={len(forme)} shapes=" + ";".join(elements))
+            elif op == 'clear':
+                self.drags_en_attente.clear()
+                self.publier("clear")
+
+    def snapshot(self):
+        """Publie l'état complet de la scène (thread de fusion uniquement)"""
+        with self.verrou:
+            formes = list(self.controller.formes)
+            self.sync_demande = False
+            self.drags_en_attente.clear()
+            self.publier(f"snapshot n={len(formes)} shapes=" + ";".join(decrire(f) for f in formes))
+            self.dernier_snapshot = time.time()
+            self.seq_snapshot = self.seq
+
+    def boucle(self):
+        """Vide les drags regroupés à FREQUENCE_MAX et publie les instantanés"""
+        while self.actif:
+            time.sleep(self.periode)
+            with self.verrou:
+                en_attente, self.drags_en_attente = self.drags_en_attente, {}
+                for forme in en_attente.values():
+                    self.publier(f"move id={forme.id} x={int(forme.x)} y={int(forme.y)}")
+            # Instantané périodique, seulement si la scène a changé depuis le dernier ;
+            # demandé au thread de fusion, qui l'ordonne avec les deltas
+            if time.time() - self.dernier_snapshot >= self.intervalle_snapshot \
+                    and self.seq != self.seq_snapshot and not self.sync_demande \
+                    and self.controller.queue is not None:
+                self.sync_demande = True
+                self.controller.queue.put(('sync', None))
+
+    def arreter(self):
+        self.actif = False
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Backends de reconnaissance vocale pour les threads d'écoute.
+
+Un backend fournit un flux de phrases (début, fin, texte) :
+- google : micro + recognize_google (réseau)
+- local  : micro + moteur hors ligne Vosk restreint au vocabulaire SRA5
+- rejeu  : fichiers WAV ou transcription horodatée relus depuis le disque,
+           en temps réel ou accéléré (benchmarks reproductibles sans réseau)
+
+L'audio (micro ou WAV) est découpé en phrases par le VAD de vad.py : une
+phrase part en reconnaissance dès le silence final détecté, et les périodes
+sans parole ne produisent rien.
+
+Capture et reconnaissance forment un pipeline : un thread de capture pousse
+les phrases dans une file bornée, un groupe de travailleurs les reconnaît en
+parallèle, et les résultats sont remis dans l'ordre de capture.
+
+Avec PAROLE_PROCESSUS=1, le backend tourne dans un processus séparé (pas de
+contention du GIL avec la boucle pygame) : les phrases reviennent sous forme
+de tuples compacts par une multiprocessing.Queue, et le processus est
+relancé automatiquement s'il plante.
+
+Sélection par variable d'environnement :
+    PAROLE_BACKEND=google | local | rejeu:chemin
+    PAROLE_PROCESSUS=0    (1 : écoute dans un processus supervisé)
+    PAROLE_VITESSE=1.0    (facteur d'accélération du rejeu)
+    PAROLE_TRAVAILLEURS=2 (reconnaissances simultanées)
+    VOSK_MODELE=modeles/vosk-model-small-fr
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import multiprocessing
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from queue import Queue, Empty
+from threading import Thread
+
+# --- Constantes ---
+LANGUE = "fr-FR"
+FREQUENCE = 16000           # Hz, format attendu par les moteurs locaux
+LARGEUR = 2                 # octets par échantillon (PCM 16 bits mono)
+BLOC_REJEU_S = 0.1          # taille des blocs WAV relus
+TRAVAILLEURS = int(os.environ.get("PAROLE_TRAVAILLEURS", "2"))
+TAILLE_FILE = 32            # phrases capturées en attente de reconnaissance
+VOSK_MODELE = os.environ.get("VOSK_MODELE", os.path.join("modeles", "vosk-model-small-fr"))
+PROCESSUS = os.environ.get("PAROLE_PROCESSUS", "0") not in ("", "0")
+MAX_REDEMARRAGES = 5        # relances successives avant abandon
+DELAI_REDEMARRAGE = 0.5     # secondes, doublé à chaque relance
+
+# Segment audio brut (PCM mono) et phrase reconnue
+SegmentAudio = namedtuple("SegmentAudio", "donnees frequence largeur debut fin")
+Phrase = namedtuple("Phrase", "debut fin texte")
+
+
+# --- Moteurs de reconnaissance (audio -> texte) ---
+class MoteurReconnaissance(ABC):
+    @abstractmethod
+    def reconnaitre(self, segment):
+        """Renvoie le texte reconnu dans le segment, ou None"""
+
+
+class MoteurGoogle(MoteurReconnaissance):
+    """recognize_google de speech_recognition (aller-retour réseau)"""
+
+    def __init__(self, langue=LANGUE):
+        import speech_recognition as sr
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+        self.langue = langue
+
+    def reconnaitre(self, segment):
+        audio = self.sr.AudioData(segment.donnees, segment.frequence, segment.largeur)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.langue)
+        except (self.sr.UnknownValueError, self.sr.RequestError):
+            return None
+
+
+class MoteurLocal(MoteurReconnaissance):
+    """Moteur hors ligne Vosk, restreint au vocabulaire de la grammaire SRA5"""
+
+    def __init__(self, chemin_modele=VOSK_MODELE, vocabulaire=True):
+        from vosk import Model, KaldiRecognizer, SetLogLevel
+        SetLogLevel(-1)
+        self.KaldiRecognizer = KaldiRecognizer
+        self.modele = Model(chemin_modele)
+        self.grammaire = None
+        if vocabulaire:
+            from grammaire import get_matcher, VARIANTES
+            matcher = get_matcher()
+            expressions = {e for entrees in matcher.vocabulaire.values() for e, _ in entrees}
+            expressions |= {e for entrees in VARIANTES.values() for e in entrees}
+            self.grammaire = json.dumps(sorted(expressions) + ["[unk]"], ensure_ascii=False)
+
+    def reconnaitre(self, segment):
+        if self.grammaire:
+            rec = self.KaldiRecognizer(self.modele, segment.frequence, self.grammaire)
+        else:
+            rec = self.KaldiRecognizer(self.modele, segment.frequence)
+        rec.AcceptWaveform(segment.donnees)
+        texte = json.loads(rec.FinalResult()).get("text", "").replace("[unk]", "").strip()
+        return texte or None
+
+
+MOTEURS = {"google": MoteurGoogle, "local": MoteurLocal}
+
+
+# --- Backends (flux de phrases) ---
+class BackendParole(ABC):
+    """Interface commune aux threads d'écoute"""
+
+    def __init__(self):
+        self.actif = True
+
+    @abstractmethod
+    def phrases(self):
+        """Générateur de Phrase(debut, fin, texte) ; texte vaut None si la
+        reconnaissance d'un segment voisé échoue
+
+        debut/fin : instants (time.time()) de début et de fin de la parole
+        """
+
+    def arreter(self):
+        self.actif = False
+
+
+class BackendAudio(BackendParole):
+    """Backend audio : capture des segments puis reconnaissance en pipeline
+
+    La capture ne s'arrête jamais pendant une reconnaissance : « déplace ça »
+    suivi immédiatement de « ici » donne deux segments reconnus en parallèle.
+    La file est bornée ; si elle est pleine, la capture attend (aucune phrase
+    n'est abandonnée).
+    """
+
+    def __init__(self, moteur, travailleurs=TRAVAILLEURS, taille_file=TAILLE_FILE):
+        super().__init__()
+        self.moteur = moteur
+        self.travailleurs = max(1, travailleurs)
+        self.taille_file = taille_file
+
+    @abstractmethod
+    def segments(self):
+        """Générateur de SegmentAudio, exécuté dans le thread de capture"""
+
+    def capturer(self, file_segments):
+        try:
+            for numero, segment in enumerate(self.segments()):
+                file_segments.put((numero, segment))
+        except Exception as e:
+            print(f"[Ecoute] Arrêt de la capture : {e}")
+        finally:
+            for _ in range(self.travailleurs):
+                file_segments.put(None)
+
+    def reconnaitre(self, file_segments, resultats):
+        while True:
+            item = file_segments.get()
+            if item is None:
+                resultats.put(None)
+                return
+            numero, segment = item
+            try:
+                texte = self.moteur.reconnaitre(segment)
+            except Exception as e:
+                print(f"[Ecoute] Erreur de reconnaissance : {e}")
+                texte = None
+            resultats.put((numero, Phrase(segment.debut, segment.fin, texte)))
+
+    def phrases(self):
+        file_segments = Queue(maxsize=self.taille_file)
+        resultats = Queue()
+        Thread(target=self.capturer, args=(file_segments,), daemon=True).start()
+        for _ in range(self.travailleurs):
+            Thread(target=self.reconnaitre, args=(file_segments, resultats), daemon=True).start()
+
+        # Remise dans l'ordre de capture (numéro croissant)
+        en_attente = {}
+        suivant = 0
+        termines = 0
+        while termines < self.travailleurs:
+            item = resultats.get()
+            if item is None:
+                termines += 1
+                continue
+            numero, phrase = item
+            en_attente[numero] = phrase
+            while suivant in en_attente:
+                yield en_attente.pop(suivant)
+                suivant += 1
+
+
+class BackendMicro(BackendAudio):
+    """Capture micro par trames + VAD"""
+
+    def __init__(self, moteur, travailleurs=TRAVAILLEURS, **options_vad):
+        super().__init__(moteur, travailleurs)
+        self.options_vad = options_vad
+
+    def segments(self):
+        import speech_recognition as sr
+        from vad import Segmenteur, taille_trame
+        segmenteur = Segmenteur(FREQUENCE, **self.options_vad)
+        with sr.Microphone(sample_rate=FREQUENCE, chunk_size=taille_trame(FREQUENCE)) as source:
+            while self.actif:
+                bloc = source.stream.read(source.CHUNK)
+                for donnees, debut, fin in segmenteur.ajouter(bloc, time.time()):
+                    yield SegmentAudio(donnees, FREQUENCE, source.SAMPLE_WIDTH, debut, fin)
+
+
+class BackendRejeuWav(BackendAudio):
+    """Relit des fichiers WAV par blocs au rythme réel / vitesse, découpés par le VAD"""
+
+    def __init__(self, chemins, moteur, vitesse=1.0, travailleurs=TRAVAILLEURS, **options_vad):
+        super().__init__(moteur, travailleurs)
+        self.chemins = chemins
+        self.vitesse = vitesse
+        self.options_vad = options_vad
+
+    def blocs(self, chemin):
+        """Blocs PCM 16 bits mono d'un fichier WAV (canal gauche si stéréo)"""
+        import numpy as np
+        with wave.open(chemin, "rb") as wav:
+            if wav.getsampwidth() != LARGEUR:
+                raise ValueError(f"[Ecoute] {chemin} : PCM 16 bits attendu")
+            canaux, frequence = wav.getnchannels(), wav.getframerate()
+            n = int(frequence * BLOC_REJEU_S)
+            while True:
+                donnees = wav.readframes(n)
+                if not donnees:
+                    break
+                if canaux > 1:
+                    donnees = np.frombuffer(donnees, dtype='<i2')[::canaux].tobytes()
+                yield frequence, donnees
+
+    def segments(self):
+        from vad import Segmenteur
+        for chemin in self.chemins:
+            segmenteur = None
+            for frequence, bloc in self.blocs(chemin):
+                if not self.actif:
+                    return
+                segmenteur = segmenteur or Segmenteur(frequence, **self.options_vad)
+                # Simule le temps réel de capture du bloc
+                if self.vitesse > 0:
+                    time.sleep(len(bloc) / (frequence * LARGEUR) / self.vitesse)
+                for donnees, debut, fin in segmenteur.ajouter(bloc, time.time()):
+                    yield SegmentAudio(donnees, frequence, LARGEUR, debut, fin)
+            dernier = segmenteur.vider(time.time()) if segmenteur else None
+            if dernier:
+                donnees, debut, fin = dernier
+                yield SegmentAudio(donnees, segmenteur.frequence, LARGEUR, debut, fin)
+
+
+class BackendRejeuTranscription(BackendParole):
+    """Relit une transcription horodatée : une ligne « secondes<TAB>texte »"""
+
+    def __init__(self, chemin, vitesse=1.0):
+        super().__init__()
+        self.chemin = chemin
+        self.vitesse = vitesse
+
+    def phrases(self):
+        debut = time.time()
+        with open(chemin_lisible(self.chemin), encoding="utf-8") as f:
+            for ligne in f:
+                ligne = ligne.strip()
+                if not ligne or ligne.startswith("#"):
+                    continue
+                instant, _, texte = ligne.partition("\t") if "\t" in ligne else ligne.partition(" ")
+                if not self.actif:
+                    break
+                cible = debut + float(instant) / self.vitesse if self.vitesse > 0 else time.time()
+                attente = cible - time.time()
+                if attente > 0:
+                    time.sleep(attente)
+                maintenant = time.time()
+                yield Phrase(maintenant, maintenant, texte.strip() or None)
+
+
+def executer_ecoute(spec, vitesse, file_phrases, arret):
+    """Corps du processus d'écoute : envoie (debut, fin, texte) au processus parent"""
+    backend = creer_backend(spec, vitesse, processus=False)
+    for phrase in backend.phrases():
+        if arret.is_set():
+            break
+        file_phrases.put(tuple(phrase))
+    backend.arreter()
+    file_phrases.put(None)  # fin normale du flux (rejeu terminé ou arrêt demandé)
+
+
+class BackendProcessus(BackendParole):
+    """Exécute un autre backend dans un processus supervisé
+
+    Le processus est lancé avec « spawn » (interpréteur neuf, sans l'état
+    pygame du parent). S'il se termine sans avoir envoyé la fin du flux, il
+    est relancé après DELAI_REDEMARRAGE, doublé à chaque échec consécutif.
+    """
+
+    def __init__(self, spec=None, vitesse=None, max_redemarrages=MAX_REDEMARRAGES):
+        super().__init__()
+        self.spec = spec
+        self.vitesse = vitesse
+        self.max_redemarrages = max_redemarrages
+        self.contexte = multiprocessing.get_context("spawn")
+        self.file = self.contexte.Queue()
+        self.arret = self.contexte.Event()
+        self.processus = None
+        self.lancer()
+
+    def lancer(self):
+        self.processus = self.contexte.Process(
+            target=executer_ecoute, args=(self.spec, self.vitesse, self.file, self.arret),
+            name="ecoute", daemon=True)
+        self.processus.start()
+
+    def phrases(self):
+        echecs = 0
+        while self.actif:
+            try:
+                item = self.file.get(timeout=0.2)
+            except Empty:
+                if self.processus.is_alive() or not self.actif:
+                    continue
+                # Le processus est mort sans signaler la fin du flux : relance
+                echecs += 1
+                if echecs > self.max_redemarrages:
+                    print(f"[Ecoute] Processus d'écoute abandonné après {self.max_redemarrages} relances")
+                    return
+                delai = DELAI_REDEMARRAGE * 2 ** (echecs - 1)
+                print(f"[Ecoute] Processus d'écoute terminé (code {self.processus.exitcode}), "
+                      f"relance dans {delai:.1f} s")
+                time.sleep(delai)
+                self.lancer()
+                continue
+            if item is None:
+                return
+            echecs = 0
+            yield Phrase(*item)
+
+    def arreter(self):
+        """Arrêt propre : fin demandée au processus, puis terminate s'il ne répond pas"""
+        super().arreter()
+        self.arret.set()
+        self.processus.join(timeout=1.0)
+        if self.processus.is_alive():
+            self.processus.terminate()
+            self.processus.join(timeout=1.0)
+
+
+def chemin_lisible(chemin):
+    if not os.path.exists(chemin):
+        raise FileNotFoundError(f"[Ecoute] Fichier de rejeu introuvable : {chemin}")
+    return chemin
+
+
+def fichiers_wav(chemin):
+    """Un fichier WAV ou tous les .wav d'un dossier (ordre alphabétique)"""
+    if os.path.isdir(chemin):
+        return sorted(os.path.join(chemin, f) for f in os.listdir(chemin) if f.lower().endswith(".wav"))
+    return [chemin_lisible(chemin)]
+
+
+def creer_backend(spec=None, vitesse=None, processus=None):
+    """Construit le backend décrit par spec (ou PAROLE_BACKEND)
+
+    processus=True (ou PAROLE_PROCESSUS=1) l'exécute dans un processus séparé.
+    """
+    if processus if processus is not None else PROCESSUS:
+        return BackendProcessus(spec, vitesse)
+    spec = spec or os.environ.get("PAROLE_BACKEND", "google")
+    vitesse = vitesse if vitesse is not None else float(os.environ.get("PAROLE_VITESSE", "1.0"))
+    nom, _, chemin = spec.partition(":")
+
+    if nom == "rejeu":
+        if chemin.lower().endswith(".wav") or os.path.isdir(chemin):
+            return BackendRejeuWav(fichiers_wav(chemin), MoteurLocal(), vitesse)
+        return BackendRejeuTranscription(chemin, vitesse)
+    if nom in MOTEURS:
+        return BackendMicro(MOTEURS[nom]())
+    raise ValueError(f"[Ecoute] Backend inconnu : {spec}")
+
+
+# --- Benchmark de latence ---
+if __name__ == "__main__":
+    # python ecoute.py rejeu:session.txt [vitesse]
+    spec = sys.argv[1] if len(sys.argv) > 1 else None
+    vitesse = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    backend = creer_backend(spec, vitesse)
+    latences = []
+    debut = time.time()
+    for phrase in backend.phrases():
+        # Latence = temps entre la fin de la parole et la disponibilité du texte
+        latence = time.time() - phrase.fin
+        latences.append(latence)
+        print(f"[{phrase.debut - debut:7.3f}s] {phrase.texte!r} (latence {latence * 1000:.1f} ms)")
+    if latences:
+        latences.sort()
+        print(f"{len(latences)} phrases, latence médiane {latences[len(latences) // 2] * 1000:.1f} ms, "
+              f"max {latences[-1] * 1000:.1f} ms")
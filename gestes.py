@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Reconnaissance de gestes ($1 minimal, nuage de points $P) et stockage des modèles.
+
+Les modèles sont normalisés une seule fois (rééchantillonnage, centrage,
+mise à l'échelle) puis enregistrés dans modeles_gestes/dollar/ (modeles_gestes/nuage/
+pour $P) : un tableau .npy (k, n, 2) float32 par classe de geste. Au démarrage, les tableaux
+sont chargés tels quels (projetés en mémoire s'ils sont gros), sans
+recalcul. Les tracés enregistrés par l'utilisateur y sont ajoutés.
+
+Les deux recognizers partagent la même interface (add_template, recognize,
+classer) ; un geste est soit une liste de points (un trait), soit une liste
+de traits. classer() note d'un seul calcul numpy un lot de gestes déjà
+normalisés (agent_gestes.py) et renvoie un score entre 0 et 1.
+
+Pendant le tracé, SimplificateurTrait décime les points souris au fil de
+l'eau : le nombre de points transmis au recognizer reste borné quelle que
+soit la fréquence de la souris ou de la tablette.
+
+Benchmark : python gestes.py
+"""
+
+import os
+import sys
+import math
+import time
+
+import numpy as np
+
+# --- Constantes ---
+N_POINTS = 64
+TAILLE_CARRE = 1.0          # boîte de normalisation
+DOSSIER_MODELES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modeles_gestes")
+SEUIL_MMAP = 1 << 20        # au-delà (octets), le fichier est projeté en mémoire
+
+N_NUAGE = 32                # points d'un nuage $P
+DELAI_MULTITRAIT = 0.6      # pause max (s) entre deux traits d'un même geste
+
+TOLERANCE_TRAIT = 2.0       # distance min (px) entre deux points retenus
+MAX_POINTS_TRAIT = 256      # points retenus au plus par trait
+
+
+def modeles_par_defaut(fermes=False):
+    """Les quatre modèles historiques de code.py (points bruts)
+
+    fermes=True referme les polygones : le nuage de points $P doit contenir
+    tous les côtés, quel que soit l'ordre dans lequel ils sont tracés.
+    """
+    modeles = {
+        "cercle": [(math.cos(t)*50+400, math.sin(t)*50+300) for t in [i*2*math.pi/32 for i in range(32)]],
+        "rectangle": [(350,250),(450,250),(450,350),(350,350)],
+        "triangle": [(400,250),(450,350),(350,350)],
+        "losange": [(400,250),(450,300),(400,350),(350,300)],
+    }
+    if fermes:
+        modeles = {name: points + points[:1] for name, points in modeles.items()}
+    return modeles
+
+
+def en_traits(geste):
+    """Normalise un geste en liste de traits (liste de listes de points)"""
+    if geste and len(geste[0]) and isinstance(geste[0][0], (tuple, list)):
+        return [list(trait) for trait in geste]
+    return [list(geste)]
+
+
+# ------------------------------
+# Simplification en ligne des traits
+# ------------------------------
+class SimplificateurTrait:
+    """Décimation radiale d'un trait en cours de tracé
+
+    Un point n'est retenu que s'il est à plus de tolerance du dernier point
+    retenu. Au-delà de max_points, un point sur deux est retiré et la
+    tolérance doublée : le coût de la reconnaissance ne dépend plus de la
+    longueur du trait. Le dernier point reçu termine toujours le trait.
+    """
+
+    def __init__(self, tolerance=TOLERANCE_TRAIT, max_points=MAX_POINTS_TRAIT):
+        self.tolerance = tolerance
+        self.max_points = max_points
+        self.points = []
+        self.dernier = None     # dernier point reçu s'il n'a pas été retenu
+
+    def ajouter(self, point):
+        if self.points and math.dist(self.points[-1], point) < self.tolerance:
+            self.dernier = point
+            return
+        self.points.append(point)
+        self.dernier = None
+        if len(self.points) > self.max_points:
+            self.points = self.points[:-1:2] + self.points[-1:]
+            self.tolerance *= 2
+
+    def trait(self):
+        """Points retenus, terminés par le dernier point reçu"""
+        return self.points + ([self.dernier] if self.dernier else [])
+
+
+def simplifier(points, **options):
+    """Applique SimplificateurTrait à un trait déjà tracé"""
+    simplificateur = SimplificateurTrait(**options)
+    for point in points:
+        simplificateur.ajouter(point)
+    return simplificateur.trait()
+
+
+# ------------------------------
+# $1 Recognizer minimal
+# ------------------------------
+class DollarOneRecognizer:
+    SOUS_DOSSIER = "dollar"     # modèles dans modeles_gestes/dollar/
+    MODELES_FERMES = False
+
+    def __init__(self):
+        self.templates = {}     # nom -> tableau (k, N_POINTS, 2) normalisé
+
+    def add_template(self, name, points):
+        self.add_normalized(name, self.normalize(points)[None])
+
+    def add_normalized(self, name, modeles):
+        """Ajoute des modèles déjà normalisés (k, N_POINTS, 2)"""
+        if name in self.templates:
+            modeles = np.concatenate((self.templates[name], modeles))
+        self.templates[name] = modeles
+        self._pile = None
+
+    def resample(self, points, n=N_POINTS):
+        """n points équidistants le long du tracé (boucle du $1 de Wobbrock et al.)
+
+        Chaque point interpolé est inséré dans le tracé et sert d'origine au
+        segment suivant : l'échantillonnage va jusqu'au bout du trait.
+        """
+        if len(points) < 2:
+            return points
+        points = list(points)  # les insertions ne doivent pas allonger le tracé de l'appelant
+        total_len = sum(math.dist(points[i], points[i+1]) for i in range(len(points)-1))
+        if total_len == 0:
+            return [points[0]] * n
+        D = total_len / (n-1)
+        new_points = [points[0]]
+        d = 0
+        i = 1
+        while i < len(points):
+            dist = math.dist(points[i-1], points[i])
+            if dist > 0 and (d + dist) >= D:
+                t = (D - d) / dist
+                x = points[i-1][0] + t*(points[i][0]-points[i-1][0])
+                y = points[i-1][1] + t*(points[i][1]-points[i-1][1])
+                new_points.append((x, y))
+                points.insert(i, (x, y))
+                d = 0
+            else:
+                d += dist
+            i += 1
+        # Erreurs d'arrondi : le dernier point peut manquer
+        while len(new_points) < n:
+            new_points.append(points[-1])
+        return new_points[:n]
+
+    def normalize(self, points):
+        """Rééchantillonne, centre et met à l'échelle un tracé -> (N_POINTS, 2)"""
+        # Un geste en plusieurs traits est lu comme un seul trait, dans l'ordre
+        points = [p for trait in en_traits(points) for p in trait]
+        pts = np.asarray(self.resample(points)[:N_POINTS], dtype=np.float32)
+        if len(pts) < N_POINTS:
+            pts = np.concatenate((pts, np.repeat(pts[-1:], N_POINTS - len(pts), axis=0)))
+        pts -= pts.mean(axis=0)
+        etendue = pts.max(axis=0) - pts.min(axis=0)
+        pts *= TAILLE_CARRE / np.where(etendue > 0, etendue, 1.0)
+        return pts
+
+    def recognize(self, points):
+        points = self.normalize(points)
+        best_score = float('inf')
+        best_name = None
+        for name, templates in self.templates.items():
+            # Distance moyenne point à point, meilleur modèle de la classe
+            score = np.linalg.norm(templates - points, axis=2).mean(axis=1).min()
+            if score < best_score:
+                best_score = score
+                best_name = name
+        return best_name
+
+    def pile(self):
+        """Tous les modèles empilés (M, N_POINTS, 2) et leur nom"""
+        if self._pile is None:
+            noms = [name for name, m in self.templates.items() for _ in range(len(m))]
+            self._pile = (np.concatenate(list(self.templates.values())), noms)
+        return self._pile
+
+    def classer(self, gestes):
+        """Lot de gestes normalisés (B, N_POINTS, 2) -> [(nom, score)]
+
+        Score $1 : 1 - distance / demi-diagonale de la boîte de normalisation.
+        """
+        if not self.templates:
+            return [(None, 0.0)] * len(gestes)
+        modeles, noms = self.pile()
+        d = np.linalg.norm(gestes[:, None] - modeles[None], axis=3).mean(axis=2)
+        meilleurs = d.argmin(axis=1)
+        scores = 1.0 - d[np.arange(len(gestes)), meilleurs] / (0.5 * math.sqrt(2) * TAILLE_CARRE)
+        return [(noms[i], float(max(score, 0.0))) for i, score in zip(meilleurs, scores)]
+
+
+# ------------------------------
+# $P Recognizer (nuage de points)
+# ------------------------------
+class PointCloudRecognizer:
+    """Reconnaissance multi-traits indépendante de l'ordre et du sens des traits
+
+    Le geste est rééchantillonné en un nuage de N_NUAGE points puis apparié
+    à chaque modèle par appariement glouton pondéré ($P). Tous les modèles
+    et tous les points de départ sont traités ensemble avec numpy.
+    """
+    SOUS_DOSSIER = "nuage"      # modèles dans modeles_gestes/nuage/
+    MODELES_FERMES = True
+
+    def __init__(self):
+        self.templates = {}     # nom -> tableau (k, N_NUAGE, 2) normalisé
+
+    def add_template(self, name, points):
+        self.add_normalized(name, self.normalize(points)[None])
+
+    def add_normalized(self, name, modeles):
+        if name in self.templates:
+            modeles = np.concatenate((self.templates[name], modeles))
+        self.templates[name] = modeles
+        self._pile = None
+
+    def resample(self, traits, n=N_NUAGE):
+        """Rééchantillonne l'ensemble des traits (sans compter les sauts entre traits)"""
+        pts = np.concatenate([np.asarray(t, dtype=np.float32).reshape(-1, 2) for t in traits])
+        segments = np.linalg.norm(np.diff(pts, axis=0), axis=1)
+        # Longueur nulle aux jonctions entre deux traits
+        fins = np.cumsum([len(t) for t in traits])[:-1] - 1
+        segments[fins] = 0.0
+        cumul = np.concatenate(([0.0], np.cumsum(segments)))
+        if cumul[-1] == 0:
+            return np.repeat(pts[:1], n, axis=0)
+        cibles = np.linspace(0.0, cumul[-1], n)
+        i = np.clip(np.searchsorted(cumul, cibles, side='right') - 1, 0, len(segments) - 1)
+        longueur = np.where(segments[i] > 0, segments[i], 1.0)
+        t = np.clip((cibles - cumul[i]) / longueur, 0.0, 1.0)[:, None]
+        return pts[i] + t * (pts[i + 1] - pts[i])
+
+    def normalize(self, points):
+        """Nuage (N_NUAGE, 2) centré, mis à l'échelle uniformément"""
+        traits = [t for t in en_traits(points) if len(t)]
+        if sum(len(t) for t in traits) < 2:
+            traits = [traits[0] * 2] if traits else [[(0, 0), (0, 0)]]
+        pts = self.resample(traits)
+        pts -= pts.mean(axis=0)
+        etendue = float((pts.max(axis=0) - pts.min(axis=0)).max())
+        return pts * (TAILLE_CARRE / etendue if etendue > 0 else 1.0)
+
+    def pile(self):
+        """Tous les modèles empilés (M, N_NUAGE, 2) et leur nom"""
+        if self._pile is None:
+            noms = [name for name, m in self.templates.items() for _ in range(len(m))]
+            self._pile = (np.concatenate(list(self.templates.values())), noms)
+        return self._pile
+
+    def distances(self, nuages, modeles):
+        """Distance $P entre un nuage (n, 2) et chaque modèle -> (M,)
+
+        Avec un lot de nuages (B, n, 2), toutes les paires sont traitées
+        ensemble -> (B, M).
+        """
+        seul = nuages.ndim == 2
+        nuages = nuages.reshape(-1, *nuages.shape[-2:])
+        b, m, n = len(nuages), len(modeles), nuages.shape[1]
+        departs = np.arange(0, n, max(1, int(n ** 0.5)))
+        # d[b, m, i, j] : point i du nuage b -> point j du modèle m, puis le sens inverse
+        dx = nuages[:, None, :, None, 0] - modeles[None, :, None, :, 0]
+        dy = nuages[:, None, :, None, 1] - modeles[None, :, None, :, 1]
+        d = np.sqrt(dx * dx + dy * dy).reshape(b * m, n, n)
+        d = np.concatenate((d, d.transpose(0, 2, 1)))
+        poids = 1.0 - np.arange(n) / n
+
+        # Une ligne par (modèle, sens, point de départ), appariées en parallèle
+        penalite = np.zeros((len(d) * len(departs), n), dtype=d.dtype)
+        somme = np.zeros(len(penalite))
+        tout = np.arange(len(penalite))
+        for k in range(n):
+            candidats = d[:, (departs + k) % n, :].reshape(-1, n) + penalite
+            j = candidats.argmin(axis=1)
+            somme += poids[k] * candidats[tout, j]
+            penalite[tout, j] = np.inf      # point du modèle déjà apparié
+        distances = somme.reshape(2, b, m, len(departs)).min(axis=(0, 3))
+        return distances[0] if seul else distances
+
+    def recognize(self, points):
+        if not self.templates:
+            return None
+        modeles, noms = self.pile()
+        scores = self.distances(self.normalize(points), modeles)
+        return noms[int(scores.argmin())]
+
+    def classer(self, gestes):
+        """Lot de nuages normalisés (B, N_NUAGE, 2) -> [(nom, score)]
+
+        Score $P : max((2 - distance) / 2, 0).
+        """
+        if not self.templates:
+            return [(None, 0.0)] * len(gestes)
+        modeles, noms = self.pile()
+        d = self.distances(np.asarray(gestes, dtype=np.float32), modeles)
+        meilleurs = d.argmin(axis=1)
+        scores = (2.0 - d[np.arange(len(gestes)), meilleurs]) / 2.0
+        return [(noms[i], float(max(score, 0.0))) for i, score in zip(meilleurs, scores)]
+
+
+RECOGNIZERS = {"dollar": DollarOneRecognizer, "nuage": PointCloudRecognizer}
+
+
+# ------------------------------
+# Stockage des modèles
+# ------------------------------
+class StockModeles:
+    """Modèles normalisés sur disque : un fichier <classe>.npy par geste"""
+
+    def __init__(self, dossier=DOSSIER_MODELES):
+        self.dossier = dossier
+
+    def chemin(self, recognizer, name):
+        return os.path.join(self.dossier, recognizer.SOUS_DOSSIER, f"{name}.npy")
+
+    def charger(self, recognizer):
+        """Charge tous les modèles ; crée les modèles par défaut au premier lancement"""
+        dossier = os.path.join(self.dossier, recognizer.SOUS_DOSSIER)
+        if not os.path.isdir(dossier) or not any(f.endswith(".npy") for f in os.listdir(dossier)):
+            for name, points in modeles_par_defaut(recognizer.MODELES_FERMES).items():
+                self.sauver(recognizer, name, recognizer.normalize(points)[None])
+
+        for fichier in sorted(os.listdir(dossier)):
+            if not fichier.endswith(".npy"):
+                continue
+            chemin = os.path.join(dossier, fichier)
+            mmap = 'r' if os.path.getsize(chemin) > SEUIL_MMAP else None
+            recognizer.add_normalized(fichier[:-4], np.load(chemin, mmap_mode=mmap))
+        return recognizer
+
+    def enregistrer(self, recognizer, name, points):
+        """Normalise un tracé utilisateur, l'ajoute au recognizer et au disque"""
+        modele = recognizer.normalize(points)[None]
+        recognizer.add_normalized(name, modele)
+        chemin = self.chemin(recognizer, name)
+        if os.path.exists(chemin):
+            modele = np.concatenate((np.load(chemin), modele))
+        self.sauver(recognizer, name, modele)
+
+    def sauver(self, recognizer, name, modeles):
+        chemin = self.chemin(recognizer, name)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        with open(chemin + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(modeles, dtype=np.float32))
+        os.replace(chemin + ".tmp", chemin)
+
+
+# ------------------------------
+# Benchmark
+# ------------------------------
+if __name__ == "__main__":
+    # Latence par geste avec k modèles par classe (python gestes.py [k])
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rng = np.random.default_rng(0)
+    essais = {
+        "cercle (1 trait)": [[(math.cos(t)*80+200, math.sin(t)*80+200) for t in np.linspace(0, 2*math.pi, 120)]],
+        "rectangle (2 traits)": [[(100,100),(300,100),(300,250)], [(100,100),(100,250),(300,250)]],
+        "triangle (anti-horaire)": [[(200,100),(100,300),(300,300),(200,100)]],
+    }
+    for nom, classe in RECOGNIZERS.items():
+        recognizer = classe()
+        for name, points in modeles_par_defaut(classe.MODELES_FERMES).items():
+            for _ in range(k):
+                bruit = rng.normal(0, 3, (len(points), 2))
+                recognizer.add_template(name, [tuple(p) for p in np.asarray(points) + bruit])
+        for essai, traits in essais.items():
+            recognizer.recognize(traits)
+            debut = time.perf_counter()
+            for _ in range(20):
+                resultat = recognizer.recognize(traits)
+            ms = (time.perf_counter() - debut) / 20 * 1000
+            print(f"{nom:7s} {essai:25s} -> {resultat:10s} {ms:6.2f} ms (budget trame 16.7 ms)")
+
+    # Reconnaissance d'un trait brut ou simplifié en ligne, de 50 à 50 000 points souris
+    print()
+    for nom, classe in RECOGNIZERS.items():
+        recognizer = classe()
+        for name, points in modeles_par_defaut(classe.MODELES_FERMES).items():
+            recognizer.add_template(name, points)
+        for n in (50, 500, 5000, 50000):
+            t = np.linspace(0, 2 * math.pi, n)
+            # Positions entières, comme celles de la souris (répétées à haute fréquence)
+            brut = [tuple(p) for p in np.rint(np.stack((np.cos(t) * 80 + 200, np.sin(t) * 60 + 200),
+                                                       axis=1)).astype(int).tolist()]
+            simplificateur = SimplificateurTrait()
+            for point in brut:
+                simplificateur.ajouter(point)       # fait pendant le tracé, hors mesure
+            simplifie = simplificateur.trait()
+            mesures = []
+            for trait in (brut, simplifie):
+                debut = time.perf_counter()
+                resultat = recognizer.recognize(list(trait))
+                mesures.append(((time.perf_counter() - debut) * 1000, resultat))
+            print(f"{nom:7s} cercle {n:6d} points : brut {mesures[0][0]:8.2f} ms -> {mesures[0][1]:9s}"
+                  f" | simplifié ({len(simplifie):3d} pts) {mesures[1][0]:6.2f} ms -> {mesures[1][1]}")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Analyse des commandes vocales à partir de la grammaire SRA5.
+
+Le vocabulaire (actions, pointage, formes, couleurs, localisation) est lu
+une seule fois dans sra5/grammaire_parole.grxml et compilé en un trie de
+mots. Une phrase reconnue est analysée en un seul passage et produit la
+même structure que la grammaire SRA5 :
+action=CREATE where=THIS form=CIRCLE color=RED localisation=THERE
+"""
+
+import os
+import re
+import unicodedata
+import xml.etree.ElementTree as ET
+
+# --- Constantes ---
+CHEMIN_GRAMMAIRE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "sra5", "grammaire_parole.grxml")
+NS = {"g": "http://www.w3.org/2001/06/grammar"}
+
+# Ordre des champs du message SRA5 (utilisé si le tag racine est illisible)
+CHAMPS_SRA5 = [("action", "action"), ("where", "pointage"), ("form", "forme"),
+               ("color", "couleur"), ("localisation", "localisation")]
+
+# Formes sans accent trop ambiguës pour être retenues ("là" -> "la")
+AMBIGUS = {"la", "a"}
+
+# Variantes parlées absentes de la grammaire (impératifs, erreurs de transcription)
+VARIANTES = {
+    "action": {"crée": "CREATE", "créé": "CREATE", "dessine": "CREATE", "trace": "CREATE",
+               "supprime": "DELETE", "efface": "DELETE",
+               "déplace": "MOVE", "des places": "MOVE", "bouge": "MOVE"},
+    "forme": {"carré": "RECTANGLE"},
+    "couleur": {"blanc": "WHITE"},
+}
+
+
+# --- Outils ---
+def sans_accents(texte):
+    texte = unicodedata.normalize('NFD', texte)
+    return ''.join(c for c in texte if unicodedata.category(c) != 'Mn')
+
+
+def decouper(texte):
+    """Découpe une phrase en mots minuscules (NFC, sans ponctuation)"""
+    if not texte:
+        return []
+    texte = unicodedata.normalize('NFC', texte).lower()
+    return re.findall(r"[\w]+", texte)
+
+
+# --- Lecture de la grammaire ---
+def lire_grammaire(chemin=CHEMIN_GRAMMAIRE):
+    """Lit le .grxml et renvoie (vocabulaire, champs)
+
+    vocabulaire : {règle: [(expression, valeur), ...]}
+    champs : [(clé du message, règle), ...] dans l'ordre de la sortie SRA5
+    """
+    racine = ET.parse(chemin).getroot()
+    regles = {r.get("id"): r for r in racine.findall("g:rule", NS)}
+
+    vocabulaire = {}
+    for nom, regle in regles.items():
+        entrees = []
+        for item in regle.findall("g:one-of/g:item", NS):
+            tag = item.find("g:tag", NS)
+            valeur = re.search(r'out\s*=\s*"([^"]*)"', tag.text or "") if tag is not None else None
+            expression = (item.text or "").strip()
+            if valeur and expression:
+                entrees.append((expression, valeur.group(1)))
+        if entrees:
+            vocabulaire[nom] = entrees
+
+    # Correspondance out.xxx -> rules.yyy puis "clé=" + out.xxx dans le tag final
+    champs = []
+    racine_regle = regles.get(racine.get("root"))
+    if racine_regle is not None:
+        sorties = {}
+        for item in racine_regle.findall("g:item", NS):
+            ref, tag = item.find("g:ruleref", NS), item.find("g:tag", NS)
+            if ref is not None and tag is not None:
+                m = re.search(r"out\.(\w+)\s*=\s*rules\.(\w+)", tag.text or "")
+                if m:
+                    sorties[m.group(1)] = m.group(2)
+        for tag in racine_regle.findall("g:tag", NS):
+            for cle, sortie in re.findall(r'"\s*(\w+)="\s*\+\s*out\.(\w+)', tag.text or ""):
+                if sortie in sorties:
+                    champs.append((cle, sorties[sortie]))
+    if not champs:
+        champs = list(CHAMPS_SRA5)
+
+    return vocabulaire, champs
+
+
+# --- Analyseur compilé ---
+class CommandMatcher:
+    """Trie de mots compilé à partir de la grammaire SRA5
+
+    Chaque expression (« de cette couleur », « ça », « créer »...) est insérée
+    sous sa forme accentuée et sans accent. match() parcourt la phrase une
+    seule fois de gauche à droite en prenant à chaque position la plus longue
+    expression connue.
+    """
+
+    def __init__(self, chemin=CHEMIN_GRAMMAIRE, extra=None):
+        self.vocabulaire, self.champs = lire_grammaire(chemin)
+        self.regle_de = {regle: cle for cle, regle in self.champs}
+        self.trie = {}
+        for regle, entrees in self.vocabulaire.items():
+            for expression, valeur in entrees:
+                self.ajouter(regle, expression, valeur)
+        # Vocabulaire supplémentaire propre à une application
+        for regle, entrees in (extra or {}).items():
+            for expression, valeur in entrees.items():
+                self.ajouter(regle, expression, valeur)
+
+    def ajouter(self, regle, expression, valeur):
+        """Insère une expression dans le trie (avec sa variante sans accent)"""
+        mots = decouper(expression)
+        variantes = [mots]
+        simples = [sans_accents(m) for m in mots]
+        if simples != mots and " ".join(simples) not in AMBIGUS:
+            variantes.append(simples)
+        for variante in variantes:
+            noeud = self.trie
+            for mot in variante:
+                noeud = noeud.setdefault(mot, {})
+            noeud[None] = (regle, valeur)
+
+    def scan(self, texte):
+        """Renvoie la liste ordonnée des (règle, valeur) trouvées dans la phrase"""
+        mots = decouper(texte)
+        trouves = []
+        i = 0
+        while i < len(mots):
+            noeud = self.trie
+            resultat, fin = None, i
+            j = i
+            while j < len(mots) and mots[j] in noeud:
+                noeud = noeud[mots[j]]
+                j += 1
+                if None in noeud:
+                    resultat, fin = noeud[None], j
+            if resultat:
+                trouves.append(resultat)
+                i = fin
+            else:
+                i += 1
+        return trouves
+
+    def match(self, texte):
+        """Analyse une phrase et renvoie la structure SRA5
+
+        Exemple : {'action': 'CREATE', 'where': None, 'form': 'CIRCLE',
+        'color': 'RED', 'localisation': 'THERE'}
+        """
+        resultat = {cle: None for cle, _ in self.champs}
+        for regle, valeur in self.scan(texte):
+            cle = self.regle_de.get(regle, regle)
+            # Comme SRA5, on garde la première occurrence de chaque champ
+            if resultat.get(cle) is None:
+                resultat[cle] = valeur
+        return resultat
+
+    def format(self, resultat):
+        """Formate un résultat comme le message Parsed de SRA5"""
+        parties = []
+        for cle, _ in self.champs:
+            valeur = resultat.get(cle)
+            parties.append(f"{cle}={valeur if valeur else ('none' if cle == 'action' else 'undefined')}")
+        return " ".join(parties)
+
+    def valeur(self, regle, mot):
+        """Valeur sémantique d'un mot isolé pour une règle (ou None)"""
+        for r, v in self.scan(mot):
+            if r == regle:
+                return v
+        return None
+
+
+# Analyseur partagé (construit une seule fois au premier usage)
+_MATCHER = None
+
+def get_matcher():
+    global _MATCHER
+    if _MATCHER is None:
+        _MATCHER = CommandMatcher(extra=VARIANTES)
+    return _MATCHER
+
+
+if __name__ == "__main__":
+    import sys
+    matcher = get_matcher()
+    for phrase in sys.argv[1:] or ["déplacer ça ici", "créer un cercle de cette couleur là"]:
+        print(f"{phrase!r} -> {matcher.format(matcher.match(phrase))}")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Rendu hors écran de scènes et de sessions enregistrées, sans fenêtre.
+
+Chaque source est chargée dans un DialogueController puis dessinée avec
+le code des formes de fusion.py (Forme.draw) sur une surface pygame
+ordinaire : ni fenêtre ni driver d'affichage. Sources acceptées :
+- un checkpoint du journal (checkpoint_*.json) : une image de la scène
+- un segment du journal (segment_*.jsonl) : commandes rejouées depuis une scène vide
+- un dossier de journal : plus ancien checkpoint conservé, puis segments suivants
+
+    python instantanes.py journal/ sessions/*/journal --sortie vignettes
+    python instantanes.py journal/ --tous 50 --format rgb --echelle 0.25 --travailleurs 4
+
+Sans --tous, une image de la scène finale par source (vignettes/<source>.png).
+Avec --tous N, une image toutes les N commandes et une image finale
+(vignettes/<source>/000050.png...). Le format rgb écrit les pixels bruts
+(3 octets par pixel, ligne par ligne, taille de la scène × echelle).
+
+Le rejeu est séquentiel et rapide ; le dessin et l'encodage des images sont
+répartis sur un pool de processus (--travailleurs, 0 : dans le processus
+principal), au plus EN_VOL images en attente par processus.
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+
+from fusion import DialogueController, CLASSES_FORMES, WIDTH, HEIGHT, WHITE
+from journal import appliquer, DOSSIER_JOURNAL
+
+# --- Constantes ---
+TRAVAILLEURS = os.cpu_count() or 1
+EN_VOL = 4                  # images en attente de rendu par processus
+FORMATS = ("png", "rgb")
+
+
+def decrire_scene(controller):
+    """Formes du contrôleur sous forme sérialisable : [(type, x, y, couleur)]"""
+    return [(forme.get_type(), forme.x, forme.y, forme.color) for forme in controller.formes]
+
+
+def lire_segment(chemin):
+    """Entrées d'un segment, jusqu'à la première ligne tronquée"""
+    with open(chemin) as f:
+        for ligne in f:
+            try:
+                yield json.loads(ligne)
+            except ValueError:
+                return
+
+
+def numero(fichier):
+    return int(os.path.basename(fichier).split("_")[1].split(".")[0])
+
+
+def sources_journal(dossier):
+    """(checkpoint de départ ou None, segments à rejouer) d'un dossier de journal"""
+    fichiers = os.listdir(dossier)
+    checkpoints = sorted((f for f in fichiers if f.startswith("checkpoint_") and f.endswith(".json")),
+                         key=numero)
+    segments = sorted((f for f in fichiers if f.startswith("segment_") and f.endswith(".jsonl")),
+                      key=numero)
+    # Le segment k suit le checkpoint k : le plus ancien checkpoint couvre la plus longue histoire
+    depart = numero(checkpoints[0]) if checkpoints else 0
+    checkpoint = os.path.join(dossier, checkpoints[0]) if checkpoints else None
+    return checkpoint, [os.path.join(dossier, f) for f in segments if numero(f) >= depart]
+
+
+def rejouer(source, tous=0):
+    """Charge source dans un DialogueController ; génère les (commandes, formes) à dessiner
+
+    Une scène toutes les tous commandes (0 : seulement la scène finale). Les
+    scènes sont produites au fil du rejeu : la mémoire ne dépend que des
+    images en attente de rendu, pas de la longueur de la session.
+    """
+    if os.path.isdir(source):
+        checkpoint, segments = sources_journal(source)
+    elif source.endswith(".jsonl"):
+        checkpoint, segments = None, [source]
+    else:
+        checkpoint, segments = source, []
+
+    controller = DialogueController()
+    if checkpoint:
+        with open(checkpoint) as f:
+            controller.restaurer_formes(json.load(f)["formes"])
+    commandes = 0
+    for segment in segments:
+        for entree in lire_segment(segment):
+            appliquer(controller, entree)
+            commandes += 1
+            if tous and commandes % tous == 0:
+                yield commandes, decrire_scene(controller)
+    if not tous or commandes % tous:
+        yield commandes, decrire_scene(controller)
+
+
+def rendre(formes, chemin, format_image="png", echelle=1.0):
+    """Dessine formes hors écran (exécutée dans un processus du pool) et écrit l'image"""
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    surface.fill(WHITE)
+    for shape_type, x, y, color in formes:
+        CLASSES_FORMES[shape_type]((x, y), tuple(color)).draw(surface)
+    if echelle != 1.0:
+        taille = (max(1, round(WIDTH * echelle)), max(1, round(HEIGHT * echelle)))
+        surface = pygame.transform.smoothscale(surface, taille)
+    if format_image == "rgb":
+        with open(chemin, "wb") as f:
+            f.write(pygame.image.tobytes(surface, "RGB"))
+    else:
+        pygame.image.save(surface, chemin)
+    return chemin
+
+
+def nom_source(source):
+    """Nom de fichier d'une source : sessions/op12/journal -> sessions_op12_journal"""
+    chemin = os.path.splitext(os.path.normpath(source))[0]
+    if os.path.isabs(chemin):
+        chemin = os.path.relpath(chemin)
+    return chemin.strip(os.sep + ".").replace(os.sep, "_") or DOSSIER_JOURNAL
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendu hors écran de scènes et de sessions")
+    parser.add_argument("sources", nargs="+", help="checkpoint .json, segment .jsonl ou dossier de journal")
+    parser.add_argument("--sortie", default="instantanes")
+    parser.add_argument("--tous", type=int, default=0, metavar="N",
+                        help="une image toutes les N commandes (0 : scène finale seulement)")
+    parser.add_argument("--format", default="png", choices=FORMATS)
+    parser.add_argument("--echelle", type=float, default=1.0)
+    parser.add_argument("--travailleurs", type=int, default=TRAVAILLEURS)
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    pool = ProcessPoolExecutor(args.travailleurs) if args.travailleurs > 0 else None
+    en_vol = deque()
+    images = 0
+    erreurs = 0
+    for source in args.sources:
+        nom = nom_source(source)
+        dossier = os.path.join(args.sortie, nom) if args.tous else args.sortie
+        try:
+            for commandes, formes in rejouer(source, args.tous):
+                os.makedirs(dossier, exist_ok=True)
+                fichier = f"{commandes:06d}.{args.format}" if args.tous else f"{nom}.{args.format}"
+                travail = (formes, os.path.join(dossier, fichier), args.format, args.echelle)
+                if pool is None:
+                    rendre(*travail)
+                else:
+                    # Nombre d'images en attente borné : le rejeu attend le rendu,
+                    # la mémoire ne dépend pas de la longueur de la session
+                    if len(en_vol) >= EN_VOL * args.travailleurs:
+                        en_vol.popleft().result()
+                    en_vol.append(pool.submit(rendre, *travail))
+                images += 1
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Instantanés] {source} ignorée : {e}")
+            erreurs += 1
+    for futur in en_vol:
+        futur.result()
+    if pool:
+        pool.shutdown()
+
+    duree = time.perf_counter() - debut
+    print(f"[Instantanés] {images} images de {len(args.sources) - erreurs} sources dans {args.sortie} "
+          f"en {duree:.2f} s")
+    return 1 if erreurs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Journal des commandes exécutées : annulation, rétablissement, reprise.
+
+Le journal observe le DialogueController et ajoute une ligne JSON par
+commande exécutée (création, déplacement, drag & drop, suppression) dans
+le segment courant de journal/ :
+
+    {"op": "create", "formes": [[3, "CIRCLE", 120, 300, [255, 0, 0]]]}
+    {"op": "move", "id": 3, "de": [120, 300], "vers": [400, 80]}
+    {"op": "delete", "formes": [[3, "CIRCLE", 400, 80, [255, 0, 0]]]}
+    {"op": "move_many", "formes": [[3, [400, 80], [410, 90]], [4, [10, 10], [20, 20]]]}
+    {"op": "recolour", "formes": [[3, [255, 0, 0], [0, 0, 255]]]}
+
+Un lot (create_many, move_many...) donne une seule entrée, annulée d'un coup.
+
+Chaque entrée contient de quoi être inversée : annuler et rétablir coûtent
+une opération, quelle que soit la longueur de la session. Les lignes sont
+écrites par lots dans un thread d'écriture. Toutes les CHECKPOINT_TOUS
+entrées, la scène complète est écrite dans un checkpoint et un nouveau
+segment est ouvert ; la reprise après un crash relit le dernier checkpoint
+puis au plus CHECKPOINT_TOUS lignes. Les segments couverts par un
+checkpoint plus récent sont supprimés en arrière-plan (compactage).
+"""
+
+import os
+import json
+import glob
+import time
+from collections import deque
+from threading import Thread, Lock
+
+# --- Constantes ---
+DOSSIER_JOURNAL = "journal"
+INTERVALLE_ECRITURE = 0.5   # secondes entre deux lots écrits sur disque
+CHECKPOINT_TOUS = 200       # entrées par segment
+PROFONDEUR_ANNULATION = 100 # commandes annulables conservées en mémoire
+CHECKPOINTS_CONSERVES = 2   # le précédent reste disponible si le dernier est corrompu
+
+
+def decrire(forme):
+    """Forme sérialisable : [id, type, x, y, [r, g, b]]"""
+    return [forme.id, forme.get_type(), int(forme.x), int(forme.y), list(forme.color[:3])]
+
+
+def inverser(entree):
+    """Entrée qui annule l'effet de entree"""
+    if entree["op"] == "create":
+        return {"op": "delete", "formes": entree["formes"]}
+    if entree["op"] == "delete":
+        return {"op": "create", "formes": entree["formes"]}
+    if entree["op"] in ("move_many", "recolour"):
+        return {"op": entree["op"], "formes": [[i, apres, avant] for i, avant, apres in entree["formes"]]}
+    return {"op": "move", "id": entree["id"], "de": entree["vers"], "vers": entree["de"]}
+
+
+def appliquer(controller, entree):
+    """Rejoue une entrée du journal sur un DialogueController"""
+    if entree["op"] == "create":
+        controller.restaurer_formes(entree["formes"])
+    elif entree["op"] == "delete":
+        controller.delete_many([description[0] for description in entree["formes"]])
+    elif entree["op"] == "move_many":
+        controller.move_many({i: tuple(apres) for i, _, apres in entree["formes"]})
+    elif entree["op"] == "recolour":
+        controller.recolour_many({i: apres for i, _, apres in entree["formes"]})
+    else:
+        controller.move_many({entree["id"]: tuple(entree["vers"])})
+
+
+class Journal:
+    """Observateur du DialogueController qui journalise et annule les commandes
+
+    Toutes les méthodes sauf fermer() sont appelées depuis le thread de fusion.
+    """
+
+    def __init__(self, controller, dossier=DOSSIER_JOURNAL, intervalle=INTERVALLE_ECRITURE,
+                 checkpoint_tous=CHECKPOINT_TOUS, profondeur=PROFONDEUR_ANNULATION):
+        self.controller = controller
+        self.dossier = dossier
+        self.intervalle = intervalle
+        self.checkpoint_tous = checkpoint_tous
+        self.connues = {}                   # id -> description (position hors drag)
+        self.annulables = deque(maxlen=profondeur)
+        self.retablissables = []
+        self.silencieux = False             # vrai pendant l'application d'une annulation
+        self.depuis_checkpoint = 0
+        self.segment = 0                    # numéro du segment courant
+        self.verrou = Lock()
+        self.en_attente = []                # lignes et checkpoints à écrire
+        self.actif = True
+        self.thread = None
+        os.makedirs(dossier, exist_ok=True)
+        controller.journal = self
+        controller.ajouter_observateur(self.on_changement)
+
+    # --- Journalisation ---
+    def on_changement(self, op, forme=None):
+        if op == 'create':
+            description = self.connues[forme.id] = decrire(forme)
+            self.enregistrer({"op": "create", "formes": [description]})
+        elif op == 'move':
+            avant = self.connues.get(forme.id)
+            apres = self.connues[forme.id] = decrire(forme)
+            if avant and avant[2:4] != apres[2:4]:
+                self.enregistrer({"op": "move", "id": forme.id, "de": avant[2:4], "vers": apres[2:4]})
+        elif op == 'delete':
+            description = self.connues.pop(forme.id, None) or decrire(forme)
+            self.enregistrer({"op": "delete", "formes": [description]})
+        elif op == 'create_many':
+            descriptions = []
+            for f in forme:
+                descriptions.append(decrire(f))
+                self.connues[f.id] = descriptions[-1]
+            self.enregistrer({"op": "create", "formes": descriptions})
+        elif op == 'delete_many':
+            descriptions = [self.connues.pop(f.id, None) or decrire(f) for f in forme]
+            self.enregistrer({"op": "delete", "formes": descriptions})
+        elif op in ('move_many', 'recolour_many'):
+            # Champs de la description concernés : position (2:4) ou couleur (4)
+            champ = slice(2, 4) if op == 'move_many' else 4
+            changements = []
+            for f in forme:
+                apres = decrire(f)
+                avant = self.connues.get(f.id, apres)
+                self.connues[f.id] = apres
+                changements.append([f.id, avant[champ], apres[champ]])
+            self.enregistrer({"op": "move_many" if op == 'move_many' else "recolour",
+                              "formes": changements})
+        elif op == 'clear' and self.connues:
+            descriptions = list(self.connues.values())
+            self.connues.clear()
+            self.enregistrer({"op": "delete", "formes": descriptions})
+        # 'drag' : seule la position finale (move) est journalisée
+
+    def enregistrer(self, entree):
+        if self.silencieux:
+            return
+        self.annulables.append(entree)
+        self.retablissables.clear()
+        self.ecrire(entree)
+
+    def ecrire(self, entree):
+        with self.verrou:
+            self.en_attente.append(json.dumps(entree))
+        self.depuis_checkpoint += 1
+        if self.depuis_checkpoint >= self.checkpoint_tous:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Demande l'écriture de la scène courante et l'ouverture d'un nouveau segment"""
+        etat = {"formes": list(self.connues.values()), "prochain_id": self.controller.prochain_id}
+        with self.verrou:
+            self.en_attente.append(etat)
+        self.depuis_checkpoint = 0
+
+    # --- Annulation ---
+    def appliquer(self, entree):
+        """Applique une entrée au contrôleur sans la rejournaliser"""
+        self.silencieux = True
+        try:
+            appliquer(self.controller, entree)
+        finally:
+            self.silencieux = False
+
+    def annuler(self):
+        if not self.annulables:
+            print("[Journal] Rien à annuler")
+            return
+        entree = self.annulables.pop()
+        inverse = inverser(entree)
+        self.appliquer(inverse)
+        self.ecrire(inverse)
+        self.retablissables.append(entree)
+        print(f"[Journal] Annulé : {entree['op']}")
+
+    def retablir(self):
+        if not self.retablissables:
+            print("[Journal] Rien à rétablir")
+            return
+        entree = self.retablissables.pop()
+        self.appliquer(entree)
+        self.ecrire(entree)
+        self.annulables.append(entree)
+        print(f"[Journal] Rétabli : {entree['op']}")
+
+    # --- Reprise ---
+    def chemin(self, prefixe, numero, extension):
+        return os.path.join(self.dossier, f"{prefixe}_{numero:06d}.{extension}")
+
+    def numeros(self, prefixe, extension):
+        fichiers = glob.glob(os.path.join(self.dossier, f"{prefixe}_*.{extension}"))
+        return sorted(int(os.path.basename(f).split("_")[1].split(".")[0]) for f in fichiers)
+
+    def recuperer(self):
+        """Reconstruit la scène (dernier checkpoint + segments suivants) puis démarre l'écriture
+
+        À appeler avant que le contrôleur ne traite des messages. Les commandes
+        rejouées redeviennent annulables.
+        """
+        debut = time.perf_counter()
+        etat, depart = {"formes": [], "prochain_id": 1}, 0
+        for numero in reversed(self.numeros("checkpoint", "json")):
+            try:
+                with open(self.chemin("checkpoint", numero, "json")) as f:
+                    etat, depart = json.load(f), numero
+                break
+            except (OSError, ValueError):
+                continue  # checkpoint incomplet : on essaie le précédent
+
+        self.silencieux = True
+        self.controller.restaurer_formes(etat["formes"])
+        self.silencieux = False
+        rejouees = 0
+        for numero in self.numeros("segment", "jsonl"):
+            if numero < depart:
+                continue
+            with open(self.chemin("segment", numero, "jsonl")) as f:
+                for ligne in f:
+                    try:
+                        entree = json.loads(ligne)
+                    except ValueError:
+                        break  # dernière ligne tronquée par le crash
+                    self.appliquer(entree)
+                    self.annulables.append(entree)
+                    rejouees += 1
+        # Les formes créées puis supprimées dans les segments rejoués ont relevé prochain_id
+        self.controller.prochain_id = max([self.controller.prochain_id, etat["prochain_id"]]
+                                          + [i + 1 for i in self.connues])
+
+        # Nouvelle session : nouveau segment précédé d'un checkpoint de la scène reprise
+        self.segment = max(self.numeros("segment", "jsonl") + self.numeros("checkpoint", "json") + [0])
+        self.checkpoint()
+        self.thread = Thread(target=self.boucle, daemon=True)
+        self.thread.start()
+        if self.connues or rejouees:
+            print(f"[Journal] {len(self.connues)} formes reprises ({rejouees} commandes rejouées) "
+                  f"en {(time.perf_counter() - debut) * 1000:.1f} ms")
+
+    # --- Écriture (thread dédié) ---
+    def boucle(self):
+        fichier = None
+        while True:
+            time.sleep(self.intervalle)
+            with self.verrou:
+                lot, self.en_attente = self.en_attente, []
+                actif = self.actif
+            for element in lot:
+                if isinstance(element, dict):
+                    if fichier:
+                        fichier.close()
+                    self.segment += 1
+                    self.ecrire_checkpoint(self.segment, element)
+                    fichier = open(self.chemin("segment", self.segment, "jsonl"), "a")
+                    self.compacter()
+                else:
+                    fichier.write(element + "\n")
+            if lot:
+                fichier.flush()
+                os.fsync(fichier.fileno())
+            if not actif:
+                fichier.close()
+                return
+
+    def ecrire_checkpoint(self, numero, etat):
+        chemin = self.chemin("checkpoint", numero, "json")
+        with open(chemin + ".tmp", "w") as f:
+            json.dump(etat, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(chemin + ".tmp", chemin)
+
+    def compacter(self):
+        """Supprime les checkpoints et segments antérieurs aux derniers checkpoints"""
+        checkpoints = self.numeros("checkpoint", "json")
+        if len(checkpoints) <= CHECKPOINTS_CONSERVES:
+            return
+        limite = checkpoints[-CHECKPOINTS_CONSERVES]
+        for prefixe, extension in (("checkpoint", "json"), ("segment", "jsonl")):
+            for numero in self.numeros(prefixe, extension):
+                if numero < limite:
+                    os.remove(self.chemin(prefixe, numero, extension))
+
+    def fermer(self):
+        """Écrit les dernières entrées et attend la fin du thread d'écriture"""
+        with self.verrou:
+            self.actif = False
+        if self.thread:
+            self.thread.join(timeout=2 * self.intervalle + 1)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Budget mémoire : tailles des structures, plafonds et instantanés tracemalloc.
+
+Chaque application déclare ses structures qui grossissent au fil de la
+session (files de messages, liste des formes, traits en cours...) avec
+memoire.surveiller(nom, objet). F6 affiche et exporte un rapport
+(memoire_*.json) : taille de chaque structure, RSS du processus, nombre
+de dépassements de plafond et, si tracemalloc est actif, les lignes de
+code dont l'allocation a le plus augmenté depuis le rapport précédent.
+
+Les plafonds se règlent par MEMOIRE_PLAFONDS="file_fusion=5000,formes=20000"
+(0 = illimité). Une FileBornee pleine évince le message le plus ancien ou
+rejette le nouveau selon sa politique ; les listes de formes refusent les
+créations au-delà du plafond, qui n'est fixé que sur demande. Chaque
+dépassement incrémente un compteur (affiché à la 1re, 10e, 100e...
+occurrence).
+
+MEMOIRE_TRACE=1 démarre tracemalloc au lancement (sinon au premier F6).
+MEMOIRE_INTERVALLE=600 ajoute une ligne de rapport toutes les 10 minutes
+à memoire.jsonl : pour les sessions de plusieurs jours, la structure qui
+grossit avec le RSS est alors visible.
+"""
+
+import os
+import json
+import time
+import tracemalloc
+from collections import Counter
+from queue import Queue
+from threading import Thread, Lock
+
+# --- Constantes ---
+PLAFONDS = {
+    "file_fusion": 10000,       # messages en attente du thread de fusion
+    "commandes_vocales": 100,   # phrases reconnues pas encore traitées
+    "formes": 0,                # formes de la scène (0 : illimité ; ex. formes=50000)
+    "traits_geste": 32,         # traits d'un geste en cours (mode nuage)
+}
+EVINCER = "evincer"             # une file pleine perd son plus ancien message
+REJETER = "rejeter"             # une file pleine ignore le nouveau message
+LIGNES_TRACE = 10               # lignes tracemalloc affichées par rapport
+FICHIER_SUIVI = "memoire.jsonl"
+
+
+def lire_plafonds(texte):
+    """ "nom=valeur,nom=valeur" -> {nom: valeur}"""
+    plafonds = {}
+    for element in texte.split(","):
+        nom, _, valeur = element.partition("=")
+        if nom.strip() and valeur.strip().isdigit():
+            plafonds[nom.strip()] = int(valeur)
+    return plafonds
+
+
+def rss_ko():
+    """Mémoire résidente du processus (Ko), None si inconnue"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # pic, faute de mieux
+    except ImportError:
+        return None
+
+
+class Memoire:
+    def __init__(self):
+        self.plafonds = dict(PLAFONDS, **lire_plafonds(os.environ.get("MEMOIRE_PLAFONDS", "")))
+        self.structures = {}        # nom -> objet (len) ou fonction renvoyant une taille
+        self.depassements = Counter()
+        self.precedent = None       # instantané tracemalloc du rapport précédent
+        self.verrou = Lock()
+        self.thread = None
+        if os.environ.get("MEMOIRE_TRACE", "0") not in ("", "0"):
+            tracemalloc.start()
+
+    # --- Structures et plafonds ---
+    def surveiller(self, nom, objet):
+        self.structures[nom] = objet
+
+    def plafond(self, nom):
+        return self.plafonds.get(nom) or None
+
+    def plein(self, nom, taille):
+        """Vrai (et dépassement compté) si taille atteint le plafond de nom"""
+        plafond = self.plafond(nom)
+        if plafond is None or taille < plafond:
+            return False
+        self.signaler(nom)
+        return True
+
+    def signaler(self, nom):
+        with self.verrou:
+            self.depassements[nom] += 1
+            n = self.depassements[nom]
+        # 1, 10, 100... : visible sans inonder la console d'une session longue
+        if str(n).strip("0") == "1":
+            print(f"[Mémoire] Plafond de {nom} atteint ({self.plafond(nom)}) : {n} dépassement(s)")
+
+    def tailles(self):
+        tailles = {}
+        for nom, objet in list(self.structures.items()):
+            try:
+                tailles[nom] = objet() if callable(objet) else len(objet)
+            except Exception:
+                tailles[nom] = None
+        return tailles
+
+    # --- Rapports ---
+    def instantane(self, lignes=LIGNES_TRACE):
+        """Lignes de code dont l'allocation a le plus augmenté depuis l'appel précédent"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            print("[Mémoire] tracemalloc démarré : comparaison au prochain rapport")
+        instantane = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+        if self.precedent is None:
+            statistiques = instantane.statistics("lineno")
+        else:
+            statistiques = instantane.compare_to(self.precedent, "lineno")
+        self.precedent = instantane
+        return [str(statistique) for statistique in statistiques[:lignes]]
+
+    def rapport(self, trace=False):
+        rapport = {
+            "t": round(time.time(), 1),
+            "rss_ko": rss_ko(),
+            "tailles": self.tailles(),
+            "plafonds": {nom: self.plafond(nom) for nom in self.plafonds},
+            "depassements": dict(self.depassements),
+        }
+        if tracemalloc.is_tracing():
+            rapport["tracemalloc_ko"] = tracemalloc.get_traced_memory()[0] // 1024
+        if trace:
+            rapport["allocations"] = self.instantane()
+        return rapport
+
+    def exporter(self, chemin=None):
+        """Affiche et écrit un rapport complet (avec tracemalloc)"""
+        chemin = chemin or time.strftime("memoire_%Y%m%d_%H%M%S.json")
+        rapport = self.rapport(trace=True)
+        print(f"[Mémoire] RSS {rapport['rss_ko']} Ko")
+        for nom, taille in rapport["tailles"].items():
+            print(f"  {nom:20s} {taille}")
+        for ligne in rapport["allocations"]:
+            print(f"  {ligne}")
+        with open(chemin, "w") as f:
+            json.dump(rapport, f, indent=2)
+        print(f"[Mémoire] Rapport écrit dans {chemin}")
+        return chemin
+
+    def suivre(self, intervalle=None, chemin=FICHIER_SUIVI):
+        """Ajoute un rapport (sans tracemalloc) à chemin toutes les intervalle secondes"""
+        intervalle = intervalle or float(os.environ.get("MEMOIRE_INTERVALLE", "0") or 0)
+        if intervalle <= 0 or self.thread:
+            return
+
+        def boucle():
+            while True:
+                time.sleep(intervalle)
+                with open(chemin, "a") as f:
+                    f.write(json.dumps(self.rapport()) + "\n")
+
+        self.thread = Thread(target=boucle, daemon=True)
+        self.thread.start()
+
+    def gerer_touche(self, key):
+        """F6 : rapport mémoire. Renvoie True si la touche est traitée"""
+        import pygame
+        if key == pygame.K_F6:
+            self.exporter()
+            return True
+        return False
+
+
+# Registre partagé par les modules d'une même application
+memoire = Memoire()
+
+
+class FileBornee(Queue):
+    """Queue plafonnée par memoire.plafond(nom) dont put() ne bloque jamais
+
+    File pleine : EVINCER retire le message le plus ancien, REJETER ignore
+    le nouveau. None (fin du thread consommateur) est toujours accepté.
+
+    jetable(message), si fourni, désigne les messages qu'une file pleine peut
+    perdre (positions de la souris...) : le plus ancien d'entre eux est évincé
+    pour faire place au nouveau message. Les autres (commandes) ne sont
+    jamais perdus, quitte à dépasser le plafond ; le message jetable le plus
+    récent est toujours conservé.
+    """
+
+    def __init__(self, nom, politique=EVINCER, jetable=None):
+        super().__init__()
+        self.nom = nom
+        self.politique = politique
+        self.jetable = jetable
+        memoire.surveiller(nom, self.qsize)
+
+    def put(self, item, block=True, timeout=None):
+        with self.not_full:
+            if memoire.plein(self.nom, self._qsize()) and not self.liberer(item):
+                return
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def liberer(self, item):
+        """File pleine : fait de la place pour item ; False si item est abandonné"""
+        if self.jetable is None:
+            if self.politique == REJETER and item is not None:
+                return False
+            self._get()
+            self.unfinished_tasks -= 1
+            return True
+        for i, message in enumerate(self.queue):
+            if message is not None and self.jetable(message):
+                del self.queue[i]
+                self.unfinished_tasks -= 1
+                return True
+        return True
@@ -0,0 +1,889 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Noyau du moteur de fusion, sans pygame ni Ivy.
+
+FSM du dialogue, FusionData, modèle de la scène (formes, instantanés
+immuables) et exécution des commandes. Le module ne dépend que de la
+bibliothèque standard et des modules purs du dépôt (grammaire, pointeur,
+memoire) : un serveur peut héberger la fusion de plusieurs postes et les
+bancs de test tournent dans un interpréteur nu.
+
+Le rendu et le transport sont des adaptateurs :
+- les formes du noyau ne connaissent que leur géométrie (sommets, contient) ;
+  fusion.py en dérive les formes pygame (tracer), passées au contrôleur par
+  DialogueController(classes=...)
+- la sélection au clic passe par DialogueController(selection=...) :
+  SelectionGeometrique par défaut, rendu.TamponIds (pixels) dans fusion.py
+- les messages arrivent par la file de demarrer(queue) quel que soit le
+  transport (bus_ivy.py, souris, rejeu) et les changements repartent par
+  les observateurs (diffusion.py, journal.py, requetes.py)
+"""
+
+import copy
+import time
+from collections import namedtuple
+from queue import Empty
+from threading import Thread
+
+from grammaire import get_matcher
+from pointeur import HistoriquePointeur
+from memoire import memoire
+
+
+# --- Constantes ---
+WIDTH, HEIGHT = 800, 600   # taille de la scène (position par défaut des créations)
+
+COLORS = {
+    'RED': (255, 0, 0),
+    'ORANGE': (255, 165, 0),
+    'YELLOW': (255, 255, 0),
+    'GREEN': (0, 255, 0),
+    'BLUE': (0, 0, 255),
+    'PURPLE': (128, 0, 128),
+    'BLACK': (50, 50, 50),
+    'SELECT': None,   # prendre la couleur sous la souris
+    'none': (50, 50, 50)  # Couleur par défaut : BLACK
+}
+
+DEFAULT_COLOR = (50, 50, 50)  # BLACK
+
+# Vocabulaire sémantique issu de sra5/grammaire_parole.grxml
+FORMES_SRA5 = {valeur for _, valeur in get_matcher().vocabulaire['forme']}
+ACTIONS_GESTES = ('CREATE', 'MOVE')  # actions qu'un geste peut déclencher
+
+# Timeout pour la fusion (en secondes)
+FUSION_TIMEOUT = 3.0
+
+# Délai estimé entre le déictique prononcé (« ça », « cette couleur ») et
+# la réception du résultat SRA5 (en secondes)
+DELAI_DEIXIS = 0.6
+
+# --- États FSM du contrôleur de dialogue ---
+class DialogState:
+    IDLE = "IDLE"
+    WAITING_SHAPE = "WAITING_SHAPE"
+    WAITING_COLOR = "WAITING_COLOR"
+    WAITING_LOCATION = "WAITING_LOCATION"
+    WAITING_TARGET = "WAITING_TARGET"
+    WAITING_MOVE_DEST = "WAITING_MOVE_DEST"
+    COMPLETE = "COMPLETE"
+
+# --- Instantané immuable de la scène ---
+# Publié par le thread de fusion ; la boucle de rendu le lit sans verrou
+# (simple lecture d'attribut) et ne modifie jamais ses formes.
+# index : id -> forme ; statique : version des formes hors drag (clé du fond en cache)
+# fusion : plus ancienne commande en attente ; commandes : toutes, de la plus ancienne à la plus récente
+Scene = namedtuple('Scene', 'version formes index statique state fusion commandes')
+
+# --- Structure de données pour la fusion ---
+class FusionData:
+    """Structure contenant les informations accumulées pour la fusion multimodale"""
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Réinitialise toutes les données de fusion"""
+        self.action = None
+        self.shape = None
+        self.color = None
+        self.location = None
+        self.target_shape = None
+        self.deictic_location = False  # "ici", "là"
+        self.deictic_color = False     # "de cette couleur"
+        self.deictic_target = False    # "cette forme", "ça"
+        self.click_position = None
+        self.mouse_position = None     # Position de la souris (sans clic)
+        self.pointage_position = None  # Position du pointeur quand le déictique a été dit
+        self.gesture = None
+        self.timestamp = None
+        
+    def is_complete_create(self):
+        if self.action != "CREATE" or not self.shape:
+            return False
+        
+        if self.deictic_location and not self.click_position:
+            return False
+            
+        return True
+    
+    def is_complete_move(self):
+        if self.action != "MOVE":
+            return False
+        
+        # MOVE THIS THERE : on a besoin du pointage (THIS) et de la destination (THERE)
+        if self.deictic_target:
+            # On doit avoir la position de la souris pour trouver l'objet
+            if not self.mouse_position:
+                return False
+            # Et on doit avoir la destination
+            if self.deictic_location and not self.click_position:
+                return False
+            return self.deictic_location  # On attend la destination
+        
+        # MOVE CIRCLE THERE : on a la forme, on attend la destination
+        if self.shape:
+            if self.deictic_location and not self.click_position:
+                return False
+            return self.deictic_location
+        
+        return False
+    
+    def is_complete_delete(self):
+        if self.action != "DELETE":
+            return False
+        
+        # DELETE sans localisation = tout effacer
+        if not self.deictic_location:
+            return True
+            
+        # DELETE avec localisation = effacer l'objet cliqué
+        if self.deictic_location and self.click_position:
+            return True
+            
+        return False
+    
+    def is_complete_quit(self):
+        """Vérifie si on a la commande QUIT"""
+        return self.action == "QUIT"
+    
+    def is_expired(self, maintenant=None):
+        """Vérifie si le timeout est dépassé"""
+        if not self.timestamp:
+            return False
+        return ((maintenant or time.time()) - self.timestamp) > FUSION_TIMEOUT
+    
+    def attend_clic(self):
+        return self.deictic_location and not self.click_position
+    
+    def attend_forme(self):
+        return self.action in ('CREATE', 'MOVE') and not self.shape and not self.deictic_target
+    
+    def est_vide(self):
+        return not (self.action or self.shape or self.color or self.gesture or self.click_position)
+    
+    def add_speech_info(self, parsed_data):
+        """Ajoute les informations de la reconnaissance vocale"""
+        if not self.timestamp:
+            self.timestamp = time.time()
+            
+        if 'action' in parsed_data and parsed_data['action']:
+            self.action = parsed_data['action']
+            
+        if 'form' in parsed_data and parsed_data['form']:
+            self.shape = parsed_data['form']
+            
+        if 'color' in parsed_data and parsed_data['color']:
+            self.color = parsed_data['color']
+            
+        if 'localisation' in parsed_data and parsed_data['localisation'] == 'THERE':
+            self.deictic_location = True
+            
+        if 'pointage' in parsed_data and parsed_data['pointage'] == 'THIS':
+            self.deictic_target = True
+    
+    def add_gesture_info(self, gesture_name):
+        """Ajoute l'information gestuelle"""
+        if not self.timestamp:
+            self.timestamp = time.time()
+        self.gesture = gesture_name
+        
+        shape, action = interpreter_geste(gesture_name)
+        if shape:
+            self.shape = shape
+        elif action in ACTIONS_GESTES:
+            self.action = action
+    
+    def add_click_info(self, position):
+        """Ajoute l'information de clic"""
+        if not self.timestamp:
+            self.timestamp = time.time()
+        self.click_position = position
+    
+    def add_mouse_position(self, position):
+        """Ajoute la position de la souris (sans clic)"""
+        self.mouse_position = position
+    
+    def position_pointee(self):
+        """Position désignée par THIS / SELECT (à défaut, la souris actuelle)"""
+        return self.pointage_position or self.mouse_position
+    
+    def __str__(self):
+        return f"FusionData(action={self.action}, shape={self.shape}, " \
+               f"color={self.color}, loc={self.deictic_location}, " \
+               f"click={self.click_position})"
+
+def interpreter_geste(gesture_name):
+    """Geste -> (forme, action) selon le vocabulaire de la grammaire SRA5"""
+    matcher = get_matcher()
+    shape = matcher.valeur('forme', gesture_name)
+    action = matcher.valeur('action', gesture_name)
+    # Noms anglais : directement les valeurs sémantiques de la grammaire
+    if not shape and gesture_name.upper() in FORMES_SRA5:
+        shape = gesture_name.upper()
+    if not action and gesture_name.upper() in ACTIONS_GESTES:
+        action = gesture_name.upper()
+    return shape, action if action in ACTIONS_GESTES else None
+
+# --- Classes Formes ---
+# Géométrie seulement : le dessin (tracer) est fourni par l'adaptateur de rendu (fusion.py)
+class Forme:
+    def __init__(self, pos, color=None, shape_type=""):
+        self.x, self.y = pos
+        self.color = color if color else DEFAULT_COLOR
+        self.shape_type = shape_type
+        self.id = None  # attribué par le DialogueController
+
+    def set_location(self, pos):
+        self.x, self.y = pos
+
+    def set_color(self, color):
+        self.color = color
+
+    def distance_to(self, pos):
+        return ((self.x - pos[0])**2 + (self.y - pos[1])**2)**0.5
+
+    def is_clicked(self, pos, threshold=40):
+        return self.distance_to(pos) < threshold
+
+    def sommets(self):
+        """Sommets du polygone de la forme, en pixels entiers"""
+        return []
+
+    def contient(self, pos):
+        """Vrai si pos est dans la forme (test du polygone par demi-droite)"""
+        x, y = pos
+        dedans = False
+        sommets = self.sommets()
+        for (x1, y1), (x2, y2) in zip(sommets, sommets[1:] + sommets[:1]):
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                dedans = not dedans
+        return dedans
+
+    def draw(self, screen):
+        return self.tracer(screen, self.color)
+    
+    def tracer(self, surface, couleur):
+        """Dessine la géométrie exacte de la forme ; renvoie le rectangle touché"""
+        pass
+    
+    def get_type(self):
+        return self.shape_type
+
+class Cercle(Forme):
+    RAYON = 30
+
+    def __init__(self, pos, color=None):
+        super().__init__(pos, color if color else DEFAULT_COLOR, "CIRCLE")
+        
+    def contient(self, pos):
+        return (pos[0] - int(self.x))**2 + (pos[1] - int(self.y))**2 <= self.RAYON**2
+
+class Rectangle(Forme):
+    def __init__(self, pos, color=None):
+        super().__init__(pos, color if color else DEFAULT_COLOR, "RECTANGLE")
+        
+    def sommets(self):
+        return [(int(self.x)-30, int(self.y)-20),
+                (int(self.x)+30, int(self.y)-20),
+                (int(self.x)+30, int(self.y)+20),
+                (int(self.x)-30, int(self.y)+20)]
+
+class Triangle(Forme):
+    def __init__(self, pos, color=None):
+        super().__init__(pos, color if color else DEFAULT_COLOR, "TRIANGLE")
+        
+    def sommets(self):
+        return [(int(self.x), int(self.y)-30), 
+                (int(self.x)+30, int(self.y)+30), 
+                (int(self.x)-30, int(self.y)+30)]
+
+class Losange(Forme):
+    def __init__(self, pos, color=None):
+        super().__init__(pos, color if color else DEFAULT_COLOR, "DIAMOND")
+        
+    def sommets(self):
+        return [(int(self.x), int(self.y)-30), 
+                (int(self.x)+30, int(self.y)), 
+                (int(self.x), int(self.y)+30), 
+                (int(self.x)-30, int(self.y))]
+
+CLASSES_FORMES = {"CIRCLE": Cercle, "RECTANGLE": Rectangle, "TRIANGLE": Triangle, "DIAMOND": Losange}
+
+def couleur_depuis(color):
+    """Couleur RGB depuis un nom SRA5, un code hexadécimal ou un triplet
+
+    SELECT (couleur sous la souris) et les chaînes illisibles donnent DEFAULT_COLOR.
+    """
+    if isinstance(color, (tuple, list)):
+        return tuple(color[:3])
+    if COLORS.get(color):
+        return COLORS[color]
+    if len(color) == 6:
+        try:
+            return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+        except ValueError:
+            pass
+    return DEFAULT_COLOR
+
+def lire_lot(op, payload):
+    """Décode la charge compacte d'un message FusionBatch
+
+        create    CIRCLE,100,200,RED;RECTANGLE,300,200,00ff00
+        move      3,120,300;4,130,310
+        translate 10,-5 3,4,5        (toutes les formes sans liste d'ids)
+        recolour  RED 3,4,5
+        delete    3,4,5
+
+    Les couleurs sont converties en RGB ; une charge mal formée lève ValueError.
+    """
+    champs = payload.split()
+    if op == 'create':
+        specs = []
+        for element in payload.split(';'):
+            shape_type, x, y, color = element.split(',')
+            specs.append((shape_type, int(x), int(y), couleur_depuis(color)))
+        return specs
+    if op == 'move':
+        positions = {}
+        for element in payload.split(';'):
+            forme_id, x, y = (int(v) for v in element.split(','))
+            positions[forme_id] = (x, y)
+        return positions
+    if op == 'translate':
+        if len(champs) not in (1, 2):
+            raise ValueError(f"translate attend dx,dy [ids] : {payload!r}")
+        dx, dy = (int(v) for v in champs[0].split(','))
+        ids = [int(v) for v in champs[1].split(',')] if len(champs) > 1 else None
+        return dx, dy, ids
+    if op == 'recolour':
+        if len(champs) != 2:
+            raise ValueError(f"recolour attend couleur ids : {payload!r}")
+        couleur = couleur_depuis(champs[0])
+        return {int(v): couleur for v in champs[1].split(',')}
+    if op == 'delete':
+        return [int(v) for v in payload.split(',')]
+    raise ValueError(f"opération inconnue : {op}")
+
+# --- Sélection au clic ---
+class SelectionGeometrique:
+    """Forme visible (la plus haute) sous une position, par test géométrique
+
+    Même interface que rendu.TamponIds (tampon de pixels de l'application
+    pygame) : reconstruire(formes), mettre_a_jour(formes, ids), id_a(position).
+    """
+
+    def __init__(self):
+        self.formes = []
+
+    def reconstruire(self, formes):
+        self.formes = formes
+
+    def mettre_a_jour(self, formes, ids):
+        self.formes = formes
+
+    def id_a(self, position):
+        """Id de la forme la plus haute contenant position, 0 si aucune"""
+        for forme in reversed(self.formes):
+            if forme.contient(position):
+                return forme.id
+        return 0
+
+# --- Contrôleur de dialogue ---
+class DialogueController:
+    def __init__(self, classes=None, selection=None):
+        """classes : type -> classe de forme (formes dessinables de l'adaptateur de rendu) ;
+        selection : tampon de sélection (SelectionGeometrique par défaut)"""
+        self.state = DialogState.IDLE
+        # Commandes partielles en attente, de la plus ancienne à la plus récente,
+        # chacune avec sa propre échéance ; fusion_data est celle en cours d'exécution
+        # (à défaut, la plus ancienne)
+        self.commandes = []
+        self.fusion_data = FusionData()
+        self.formes = []
+        self.last_clicked_forme = None
+        self.app = None  # Référence à l'app pour pouvoir quitter
+        self.prochain_id = 1
+        self.observateurs = []  # fonctions (op, forme) appelées à chaque mutation
+        self.queue = None
+        self.thread = None
+        self.scene = Scene(0, (), {}, 0, self.state, FusionData(), ())
+        self.copies = {}         # id -> copie publiée, réutilisée tant que la forme ne change pas
+        self.modifiees = set()   # ids notifiés depuis la dernière publication
+        self.version_statique = 0
+        self.par_id = {}         # id -> forme
+        self.classes = classes or CLASSES_FORMES
+        # Tampon de sélection (géométrie exacte), mis à jour à la publication et avant chaque requête
+        self.tampon = selection or SelectionGeometrique()
+        self.ids_tampon = set()
+        self.tampon_complet = False
+        self.pointeur = HistoriquePointeur()
+        self.journal = None  # Journal des commandes (undo/redo), voir journal.py
+        memoire.surveiller("formes", lambda: len(self.formes))
+        memoire.surveiller("copies_scene", lambda: len(self.copies))
+        memoire.surveiller("historique_pointeur", self.pointeur)
+        
+    def set_app(self, app):
+        """Définit la référence à l'application"""
+        self.app = app
+    
+    def ajouter_observateur(self, observateur):
+        """Enregistre une fonction appelée sur create/move/drag/delete/clear"""
+        self.observateurs.append(observateur)
+    
+    def notifier(self, op, forme=None):
+        # Toute mutation d'une forme doit être notifiée : l'instantané ne recopie que ces formes
+        formes = forme if isinstance(forme, list) else [forme] if forme is not None else []
+        for f in formes:
+            self.modifiees.add(f.id)
+            self.ids_tampon.add(f.id)
+            if op in ('delete', 'delete_many'):
+                self.par_id.pop(f.id, None)
+            else:
+                self.par_id[f.id] = f
+        if op == 'clear':
+            self.par_id.clear()
+            self.tampon_complet = True
+        if op not in ('drag', 'sync'):
+            self.version_statique += 1
+        for observateur in self.observateurs:
+            observateur(op, forme)
+    
+    # --- Thread de fusion ---
+    def demarrer(self, queue):
+        """Consomme la file d'entrée dans un thread dédié, dès l'arrivée des messages"""
+        self.queue = queue
+        self.thread = Thread(target=self.boucle, daemon=True)
+        self.thread.start()
+    
+    def arreter(self):
+        if self.queue:
+            self.queue.put(None)
+    
+    def boucle(self):
+        """Traite les messages par rafales puis publie un seul instantané"""
+        while True:
+            messages = [self.queue.get()]
+            try:
+                while messages[-1] is not None:
+                    messages.append(self.queue.get_nowait())
+            except Empty:
+                pass
+            changement = False
+            for message in messages:
+                if message is None:
+                    return
+                try:
+                    changement |= self.traiter(*message)
+                except Exception as e:
+                    # Un message invalide ne doit pas arrêter la fusion
+                    print(f"[Fusion] Message {message[0]} ignoré : {e}")
+                    changement = True
+            if changement:
+                self.publier_scene()
+    
+    def traiter(self, msg_type, msg_data, horodatage=None):
+        """Applique un message ; renvoie False s'il ne peut pas changer l'affichage"""
+        expirees = self.expirer()
+        if msg_type == 'speech':
+            self.process_speech(msg_data, horodatage)
+        elif msg_type == 'gesture':
+            self.process_gesture(msg_data)
+        elif msg_type == 'click':
+            self.process_click(msg_data)
+        elif msg_type == 'mouse':
+            self.update_mouse_position(msg_data, horodatage)
+            return expirees
+        elif msg_type == 'drag':
+            forme_id, position = msg_data
+            forme = self.get_forme_by_id(forme_id)
+            if forme:
+                self.drag_forme(forme, position)
+        elif msg_type == 'drop':
+            forme = self.get_forme_by_id(msg_data)
+            if forme:
+                self.drop_forme(forme)
+        elif msg_type == 'sync':
+            self.notifier('sync')
+            return expirees
+        elif msg_type == 'batch':
+            self.process_batch(*msg_data)
+        elif msg_type == 'undo' and self.journal:
+            self.journal.annuler()
+        elif msg_type == 'redo' and self.journal:
+            self.journal.retablir()
+        return True
+    
+    def publier_scene(self):
+        """Remplace l'instantané (copies des formes et de la fusion en cours)
+
+        Seules les formes notifiées depuis la publication précédente sont
+        recopiées ; les autres copies sont partagées entre instantanés.
+        """
+        self.synchroniser_tampon()
+        for forme_id in self.modifiees:
+            self.copies.pop(forme_id, None)
+        self.modifiees.clear()
+        formes = []
+        for forme in self.formes:
+            copie = self.copies.get(forme.id)
+            if copie is None:
+                copie = self.copies[forme.id] = copy.copy(forme)
+            formes.append(copie)
+        if len(self.copies) > len(formes):
+            self.copies = {copie.id: copie for copie in formes}
+        commandes = tuple(copy.copy(fd) for fd in self.commandes)
+        self.scene = Scene(self.scene.version + 1, tuple(formes), dict(self.copies),
+                           self.version_statique, self.state,
+                           commandes[0] if commandes else FusionData(), commandes)
+    
+    def drag_forme(self, forme, position):
+        """Déplacement continu pendant un drag & drop"""
+        forme.set_location(position)
+        self.notifier('drag', forme)
+    
+    def drop_forme(self, forme):
+        """Fin du drag & drop : position définitive"""
+        self.notifier('move', forme)
+    
+    # --- Commandes par lot (une mutation, une notification, un instantané) ---
+    def create_many(self, specs):
+        """Crée des formes décrites par (type, x, y, couleur)
+
+        couleur : nom SRA5 (RED...), hexadécimal (ff0000) ou (r, g, b).
+        """
+        creees = []
+        for shape_type, x, y, color in specs:
+            classe = self.classes.get(shape_type)
+            if not classe:
+                continue
+            if memoire.plein("formes", len(self.formes) + len(creees)):
+                break
+            forme = classe((x, y), couleur_depuis(color))
+            forme.id = self.prochain_id
+            self.prochain_id += 1
+            creees.append(forme)
+        print(f"[Lot] {len(creees)} formes créées")
+        return self.ajouter_formes(creees)
+    
+    def restaurer_formes(self, descriptions):
+        """Recrée des formes décrites par [id, type, x, y, couleur] (journal)"""
+        formes = []
+        for forme_id, shape_type, x, y, color in descriptions:
+            forme = self.classes[shape_type]((x, y), tuple(color))
+            forme.id = forme_id
+            self.prochain_id = max(self.prochain_id, forme_id + 1)
+            formes.append(forme)
+        return self.ajouter_formes(formes)
+    
+    def ajouter_formes(self, formes):
+        self.formes.extend(formes)
+        if formes:
+            self.notifier('create_many', formes)
+        return formes
+    
+    def formes_par_id(self, ids):
+        ids = set(ids)
+        return [forme for forme in self.formes if forme.id in ids]
+    
+    def move_many(self, positions):
+        """Déplace des formes : {id: (x, y)}"""
+        formes = self.formes_par_id(positions)
+        for forme in formes:
+            forme.set_location(positions[forme.id])
+        if formes:
+            self.notifier('move_many', formes)
+        return formes
+    
+    def translate_many(self, dx, dy, ids=None):
+        """Translate les formes désignées (toutes si ids vaut None)"""
+        formes = self.formes if ids is None else self.formes_par_id(ids)
+        return self.move_many({forme.id: (forme.x + dx, forme.y + dy) for forme in formes})
+    
+    def recolour_many(self, couleurs):
+        """Change la couleur de formes : {id: couleur}"""
+        formes = self.formes_par_id(couleurs)
+        for forme in formes:
+            forme.set_color(couleur_depuis(couleurs[forme.id]))
+        if formes:
+            self.notifier('recolour_many', formes)
+        return formes
+    
+    def delete_many(self, ids):
+        formes = self.formes_par_id(ids)
+        if formes:
+            retirees = {forme.id for forme in formes}
+            self.formes = [forme for forme in self.formes if forme.id not in retirees]
+            self.notifier('delete_many', formes)
+        return formes
+    
+    def process_batch(self, op, payload):
+        """Applique un lot reçu sur Ivy (FusionBatch <op> <payload>, voir lire_lot)"""
+        try:
+            args = lire_lot(op, payload)
+            if op == 'create':
+                self.create_many(args)
+            elif op == 'move':
+                self.move_many(args)
+            elif op == 'translate':
+                self.translate_many(*args)
+            elif op == 'recolour':
+                self.recolour_many(args)
+            elif op == 'delete':
+                self.delete_many(args)
+        except (ValueError, KeyError) as e:
+            print(f"[Lot] Lot invalide ({op}) : {e}")
+    
+    def update_mouse_position(self, position, horodatage=None):
+        """Met à jour la position de la souris pour les commandes"""
+        self.pointeur.ajouter(horodatage or time.time(), position)
+        for fd in self.commandes:
+            fd.add_mouse_position(position)
+    
+    def get_forme_by_id(self, forme_id):
+        return self.par_id.get(forme_id)
+    
+    def synchroniser_tampon(self):
+        """Reporte dans le tampon de sélection les formes notifiées depuis la dernière fois"""
+        if self.tampon_complet:
+            self.tampon.reconstruire(self.formes)
+        else:
+            self.tampon.mettre_a_jour(self.formes, self.ids_tampon)
+        self.ids_tampon = set()
+        self.tampon_complet = False
+    
+    def get_forme_at_position(self, position):
+        """Forme visible (la plus haute) sous une position, d'après le tampon de sélection"""
+        self.synchroniser_tampon()
+        return self.get_forme_by_id(self.tampon.id_a(position))
+        
+    def process_speech(self, parsed_text, horodatage=None):
+        """Traite une commande vocale et met à jour la fusion"""
+        # Parse le format SRA5: "action=CREATE form=CIRCLE color=RED localisation=THERE"
+        parsed = {}
+        for part in parsed_text.split():
+            if '=' in part:
+                key, value = part.split('=', 1)
+                parsed[key] = value
+        
+        # Une nouvelle action ouvre une nouvelle commande, sauf si la plus récente
+        # n'en a pas encore (clic ou geste qui précède la parole)
+        fd = self.commandes[-1] if self.commandes else None
+        if fd is None or (parsed.get('action') and fd.action):
+            fd = self.nouvelle_commande()
+        fd.add_speech_info(parsed)
+        self.resoudre_deixis(fd, horodatage)
+        print(f"[Speech] Added: {parsed}")
+        print(f"[Fusion] {fd}")
+        
+        self.update_state()
+    
+    def nouvelle_commande(self):
+        fd = FusionData()
+        fd.mouse_position = self.pointeur.derniere()
+        self.commandes.append(fd)
+        return fd
+    
+    def commande_pour(self, compatible):
+        """Plus ancienne commande compatible ; à défaut la plus récente si elle n'a pas
+        d'action, sinon une nouvelle commande"""
+        for fd in self.commandes:
+            if compatible(fd):
+                return fd
+        if self.commandes and not self.commandes[-1].action:
+            return self.commandes[-1]
+        return self.nouvelle_commande()
+    
+    def expirer(self):
+        """Retire les commandes dont l'échéance est passée ; renvoie True s'il y en a"""
+        maintenant = time.time()
+        expirees = [fd for fd in self.commandes if fd.is_expired(maintenant)]
+        for fd in expirees:
+            print(f"[Fusion] TIMEOUT - {fd}")
+            self.commandes.remove(fd)
+        if expirees:
+            self.mettre_a_jour_etat()
+        return bool(expirees)
+    
+    def resoudre_deixis(self, fd, horodatage=None):
+        """Fixe la position pointée au moment où « ça » / « cette couleur » a été dit"""
+        if fd.pointage_position or not (fd.deictic_target or fd.color == 'SELECT'):
+            return
+        instant = (horodatage or time.time()) - DELAI_DEIXIS
+        fd.pointage_position = self.pointeur.position_a(instant)
+        if fd.pointage_position:
+            print(f"[Deixis] Pointeur à {fd.pointage_position} ({DELAI_DEIXIS:.1f} s avant le résultat)")
+    
+    def process_gesture(self, gesture_name):
+        """Traite un geste reconnu"""
+        shape, action = interpreter_geste(gesture_name)
+        if shape:
+            fd = self.commande_pour(FusionData.attend_forme)
+        else:
+            fd = self.commande_pour(lambda fd: action and not fd.action)
+        fd.add_gesture_info(gesture_name)
+        print(f"[Gesture] Added: {gesture_name}")
+        print(f"[Fusion] {fd}")
+        
+        self.update_state()
+    
+    def process_click(self, position):
+        """Traite un clic souris"""
+        fd = self.commande_pour(FusionData.attend_clic)
+        if fd.click_position:
+            fd = self.nouvelle_commande()
+        fd.add_click_info(position)
+        
+        # Trouver la forme cliquée
+        clicked = self.get_forme_at_position(position)
+        if clicked:
+            self.last_clicked_forme = clicked
+        
+        print(f"[Click] Position: {position}, Forme: {clicked.get_type() if clicked else 'None'}")
+        print(f"[Fusion] {fd}")
+        
+        self.update_state()
+    
+    def update_state(self):
+        """Exécute, dans l'ordre, les commandes en tête de file qui sont complètes
+
+        Une commande complète attend que les plus anciennes soient exécutées ou
+        expirées : les commandes enchaînées s'appliquent dans l'ordre où elles
+        ont été dites. QUIT est exécuté immédiatement.
+        """
+        self.expirer()
+        for fd in self.commandes:
+            if fd.is_complete_quit():
+                self.commandes.remove(fd)
+                self.fusion_data = fd
+                self.execute_quit()
+                break
+        
+        while self.commandes:
+            fd = self.commandes[0]
+            if fd.is_complete_delete():
+                executer = self.execute_delete
+            elif fd.is_complete_create():
+                executer = self.execute_create
+            elif fd.is_complete_move():
+                executer = self.execute_move
+            else:
+                break
+            self.commandes.pop(0)
+            self.fusion_data = fd
+            executer()
+        
+        # Commandes vides (position de souris seule)
+        self.commandes = [fd for fd in self.commandes if not fd.est_vide()]
+        self.mettre_a_jour_etat()
+    
+    def mettre_a_jour_etat(self):
+        """État d'attente de la plus ancienne commande"""
+        self.fusion_data = self.commandes[0] if self.commandes else FusionData()
+        self.state = DialogState.IDLE
+        if self.fusion_data.action == "CREATE":
+            if not self.fusion_data.shape:
+                self.state = DialogState.WAITING_SHAPE
+            else:
+                self.state = DialogState.WAITING_LOCATION
+        
+        elif self.fusion_data.action == "MOVE":
+            self.state = DialogState.WAITING_MOVE_DEST
+        
+        elif self.fusion_data.action == "DELETE":
+            if self.fusion_data.attend_clic():
+                self.state = DialogState.WAITING_LOCATION
+    
+    def execute_create(self):
+        """Exécute la création d'une forme"""
+        # Déterminer la position
+        if self.fusion_data.deictic_location and self.fusion_data.click_position:
+            pos = self.fusion_data.click_position
+        else:
+            pos = (WIDTH // 2, HEIGHT // 2)
+        
+        # Déterminer la couleur
+        color = DEFAULT_COLOR
+        if self.fusion_data.color == 'SELECT':
+            # Prendre la couleur de la forme sous la souris
+            if self.fusion_data.position_pointee():
+                forme_sous_souris = self.get_forme_at_position(self.fusion_data.position_pointee())
+                if forme_sous_souris:
+                    color = forme_sous_souris.color
+                    print(f"[CREATE] Couleur SELECT détectée: {color}")
+        elif self.fusion_data.color:
+            color = COLORS.get(self.fusion_data.color, DEFAULT_COLOR)
+        
+        # Créer la forme
+        shape_type = self.fusion_data.shape
+        classe = self.classes.get(shape_type)
+        if not classe:
+            return
+        forme = classe(pos, color)
+        
+        if memoire.plein("formes", len(self.formes)):
+            print(f"[Action] Création refusée : {len(self.formes)} formes")
+            return
+        forme.id = self.prochain_id
+        self.prochain_id += 1
+        self.formes.append(forme)
+        self.notifier('create', forme)
+        print(f"[Action] Created {shape_type} at {pos} with color {color}")
+    
+    def execute_move(self):
+        """Exécute le déplacement d'une forme"""
+        target_forme = None
+        
+        # CAS 1: MOVE THIS THERE - déplacer l'objet sous la souris
+        if self.fusion_data.deictic_target and self.fusion_data.mouse_position:
+            target_forme = self.get_forme_at_position(self.fusion_data.position_pointee())
+            if target_forme:
+                print(f"[MOVE] Forme THIS détectée: {target_forme.get_type()}")
+        
+        # CAS 2: MOVE CIRCLE THERE - déplacer par type de forme (sans couleur)
+        elif self.fusion_data.shape and not self.fusion_data.color:
+            for forme in self.formes:
+                if forme.get_type() == self.fusion_data.shape:
+                    target_forme = forme
+                    print(f"[MOVE] Forme trouvée par type: {target_forme.get_type()}")
+                    break
+        
+        # CAS 3: MOVE CIRCLE YELLOW THERE - déplacer par type ET couleur
+        elif self.fusion_data.shape and self.fusion_data.color:
+            target_color = COLORS.get(self.fusion_data.color, DEFAULT_COLOR)
+            for forme in self.formes:
+                if forme.get_type() == self.fusion_data.shape and forme.color == target_color:
+                    target_forme = forme
+                    print(f"[MOVE] Forme trouvée par type+couleur: {target_forme.get_type()}")
+                    break
+        
+        # Déplacer vers la destination
+        if target_forme and self.fusion_data.deictic_location and self.fusion_data.click_position:
+            target_forme.set_location(self.fusion_data.click_position)
+            self.notifier('move', target_forme)
+            print(f"[Action] Moved {target_forme.get_type()} to {self.fusion_data.click_position}")
+        elif target_forme:
+            print(f"[Action] Found {target_forme.get_type()} but no destination specified")
+    
+    def execute_delete(self):
+        """Exécute la suppression - DELETE efface tout, DELETE THERE efface l'objet cliqué"""
+        if not self.fusion_data.deictic_location:
+            # DELETE sans localisation = tout effacer
+            count = len(self.formes)
+            self.formes.clear()
+            self.notifier('clear')
+            print(f"[Action] Deleted all {count} shapes")
+        else:
+            # DELETE avec localisation = effacer l'objet cliqué
+            if self.fusion_data.click_position:
+                forme = self.get_forme_at_position(self.fusion_data.click_position)
+                if forme:
+                    self.formes.remove(forme)
+                    self.notifier('delete', forme)
+                    print(f"[Action] Deleted {forme.get_type()} at {self.fusion_data.click_position}")
+    
+    def execute_quit(self):
+        """Exécute la fermeture de l'application"""
+        print("[Action] QUIT - Fermeture de l'application")
+        if self.app:
+            self.app.running = False
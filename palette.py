@@ -1,14 +1,14 @@
+from demarrage import chrono, init_pygame
+
 import pygame
 import random
 import sys
-import speech_recognition as sr
-from queue import Queue
 import time
 import threading
-
-# Initialisation de pygame
-pygame.init()
-pygame.mixer.init()
+from grammaire import get_matcher
+from ecoute import creer_backend
+from rendu import RenduCalques
+from memoire import memoire, FileBornee
 
 # Définition des constantes et des couleurs
 WIDTH, HEIGHT = 800, 600
@@ -50,7 +50,7 @@ class Cercle(Forme):
         self.radius = 30
     
     def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
+        return pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
 
 
 class Rectangle(Forme):
@@ -60,7 +60,7 @@ class Rectangle(Forme):
         self.height = 40
     
     def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x - self.width//2, self.y - self.height//2, self.width, self.height))
+        return pygame.draw.rect(screen, self.color, (self.x - self.width//2, self.y - self.height//2, self.width, self.height))
 
 
 class Triangle(Forme):
@@ -71,7 +71,7 @@ class Triangle(Forme):
     def draw(self, screen):
         points = [(self.x, self.y - self.size), (self.x + self.size, self.y + self.size),
                   (self.x - self.size, self.y + self.size)]
-        pygame.draw.polygon(screen, self.color, points)
+        return pygame.draw.polygon(screen, self.color, points)
 
 
 class Losange(Forme):
@@ -82,37 +82,57 @@ class Losange(Forme):
     def draw(self, screen):
         points = [(self.x, self.y - self.size), (self.x + self.size, self.y),
                   (self.x, self.y + self.size), (self.x - self.size, self.y)]
-        pygame.draw.polygon(screen, self.color, points)
+        return pygame.draw.polygon(screen, self.color, points)
+
+# Valeurs sémantiques de la grammaire SRA5 -> classes et couleurs
+FORMES = {'CIRCLE': Cercle, 'RECTANGLE': Rectangle, 'TRIANGLE': Triangle, 'DIAMOND': Losange}
+matcher = get_matcher()
+COULEURS_SRA5 = {matcher.valeur('couleur', nom): val for nom, val in COLORS.items()}
 
 # ----- Utilitaires -----
 def assombrir_couleur(couleur):
     return tuple(max(c - 70, 0) for c in couleur)
 
 # ----- Écoute vocale -----
-def ecouter_commande_thread(commande_queue):
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        while True:
-            try:
-                audio = recognizer.listen(source, timeout=1, phrase_time_limit=3)
-                commande = recognizer.recognize_google(audio, language="fr-FR")
-                print(f"Commande entendue : {commande}")
-                commande_queue.put(commande.lower())
-            except:
-                commande_queue.put(None)
+def ecouter_commande_thread(commande_queue, backend=None):
+    # Backend choisi par PAROLE_BACKEND (google, local, rejeu:fichier)
+    backend = backend or creer_backend()
+    for phrase in backend.phrases():
+        # Seuls les segments voisés et reconnus produisent une commande
+        if phrase.texte:
+            print(f"Commande entendue : {phrase.texte}")
+            commande_queue.put(phrase.texte.lower())
+
+# Backends actifs, arrêtés à la fermeture (processus d'écoute avec PAROLE_PROCESSUS=1)
+ecoutes = []
+
+def demarrer_ecoute(commande_queue):
+    # Création du backend (import speech_recognition / modèle Vosk) hors du thread pygame
+    try:
+        backend = creer_backend()
+    except Exception as e:
+        print(f"[Ecoute] Écoute indisponible : {e}")
+        return
+    ecoutes.append(backend)
+    listen_thread = threading.Thread(target=ecouter_commande_thread, args=(commande_queue, backend))
+    listen_thread.daemon = True
+    listen_thread.start()
+
+chrono.etape("imports")
 
 # ----- Programme principal -----
 def main():
+    init_pygame()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Palette multimodale")
+    chrono.etape("fenêtre")
 
     formes = []
     mae = INITIAL
 
-    commande_queue = Queue()
-    listen_thread = threading.Thread(target=ecouter_commande_thread, args=(commande_queue,))
-    listen_thread.daemon = True
-    listen_thread.start()
+    # Phrases en attente : au-delà du plafond, les plus anciennes sont perdues
+    commande_queue = FileBornee("commandes_vocales")
+    chrono.lancer("micro", demarrer_ecoute, commande_queue)
 
     forme_selectionnee = None
     couleur_originale = None
@@ -121,42 +141,41 @@ def main():
     derniere_pos_souris = (0, 0)
     temps_dernier_mouvement = time.time()
 
+    # Fond des formes immobiles en cache ; la forme suivie est redessinée à chaque frame
+    # (RENDU_8BITS=1 : fond 8 bits indexé sur les couleurs de la palette)
+    rendu = RenduCalques((WIDTH, HEIGHT), WHITE, couleurs=COLORS.values(), regions=True)
+
+    # Structures suivies par le rapport mémoire (F6)
+    memoire.surveiller("formes", lambda: len(formes))
+    memoire.suivre()
+
     running = True
     while running:
-        screen.fill(WHITE)
 
         # --- Commandes vocales ---
         if not commande_queue.empty():
             commande = commande_queue.get()
             if commande:
+                # Analyse en un seul passage (vocabulaire de la grammaire SRA5)
+                analyse = matcher.match(commande)
+                ici = analyse['localisation'] == 'THERE'
+
                 # Création d’une forme
-                if any(f in commande for f in ["cercle", "rectangle", "triangle", "losange"]):
-                    pos = pygame.mouse.get_pos() if "ici" in commande else (WIDTH // 2, HEIGHT // 2)
-
-                    if "cercle" in commande:
-                        forme = Cercle(*pos)
-                    elif "rectangle" in commande:
-                        forme = Rectangle(*pos)
-                    elif "triangle" in commande:
-                        forme = Triangle(*pos)
-                    elif "losange" in commande:
-                        forme = Losange(*pos)
+                if analyse['form'] in FORMES and not memoire.plein("formes", len(formes)):
+                    pos = pygame.mouse.get_pos() if ici else (WIDTH // 2, HEIGHT // 2)
+                    forme = FORMES[analyse['form']](*pos)
 
                     # Déterminer la couleur
-                    couleur_trouvee = False
-                    for c_nom, c_val in COLORS.items():
-                        if c_nom in commande:
-                            forme.set_color(c_val)
-                            couleur_trouvee = True
-                            break
-                    if not couleur_trouvee:
+                    if analyse['color'] in COULEURS_SRA5:
+                        forme.set_color(COULEURS_SRA5[analyse['color']])
+                    else:
                         forme.set_color(random.choice([RED, GREEN, BLUE, YELLOW, BLACK]))
 
                     formes.append(forme)
                     mae = AFFICHER_FORMES
 
                 # Déplacement par la parole
-                elif "déplace ça ici" in commande and formes:
+                elif analyse['action'] == 'MOVE' and formes:
                     souris = pygame.mouse.get_pos()
                     # Trouver la forme la plus proche du pointeur
                     forme_selectionnee = min(formes, key=lambda f: f.distance_to(souris))
@@ -166,7 +185,7 @@ def main():
                     souris_mouvement = True
                     print(f"Forme {forme_selectionnee.__class__.__name__} sélectionnée pour déplacement.")
 
-                elif "là" in commande and selection_active and forme_selectionnee:
+                elif ici and selection_active and forme_selectionnee:
                     souris = pygame.mouse.get_pos()
                     forme_selectionnee.set_location(*souris)
                     forme_selectionnee.set_color(couleur_originale)
@@ -175,7 +194,7 @@ def main():
                     souris_mouvement = False
                     print("Forme déplacée.")
 
-                elif "quitter" in commande:
+                elif analyse['action'] == 'QUIT':
                     running = False
 
         # --- Suivi visuel pendant le déplacement ---
@@ -203,14 +222,26 @@ def main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN:
+                memoire.gerer_touche(event.key)  # F6 : rapport mémoire
 
         # --- Affichage ---
         if mae != INITIAL:
-            for f in formes:
-                f.draw(screen)
+            # L'ensemble statique change à chaque création et à chaque sélection / pose
+            mobiles = [forme_selectionnee] if forme_selectionnee else []
+            rendu.composer(screen, formes, (len(formes), id(forme_selectionnee), couleur_originale),
+                           map(id, mobiles))
+            for f in mobiles:
+                rendu.marquer(f.draw(screen))
+        else:
+            screen.fill(WHITE)
+            rendu.invalider()
 
         pygame.display.flip()
+        chrono.premiere_frame()
 
+    for backend in ecoutes:
+        backend.arreter()
     pygame.quit()
     sys.exit()
 
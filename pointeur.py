@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Historique horodaté du pointeur pour la résolution des déictiques.
+
+Le résultat SRA5 arrive plusieurs centaines de millisecondes après que
+l'utilisateur a dit « ça » ou « cette couleur » ; entre-temps la souris a
+bougé. Les positions sont conservées dans un tampon circulaire de taille
+fixe (trois tableaux array) et retrouvées par recherche dichotomique :
+mémoire constante quelle que soit la durée de la session. Bibliothèque
+standard seulement : le module fait partie du noyau de fusion.
+"""
+
+from array import array
+from bisect import bisect_right
+
+# --- Constantes ---
+CAPACITE = 2048             # échantillons conservés (~30 s de mouvements continus à 60 Hz)
+
+
+class HistoriquePointeur:
+    """Tampon circulaire d'échantillons (t, x, y), t croissant"""
+
+    def __init__(self, capacite=CAPACITE):
+        self.capacite = capacite
+        self.t = array('d', bytes(8 * capacite))
+        self.x = array('i', [0]) * capacite
+        self.y = array('i', [0]) * capacite
+        self.debut = 0              # indice physique du plus ancien échantillon
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def ajouter(self, horodatage, position):
+        """Ajoute un échantillon ; le plus ancien est écrasé quand le tampon est plein"""
+        if self.n and horodatage < self.t[(self.debut + self.n - 1) % self.capacite]:
+            return  # échantillon en retard : l'ordre des temps doit être conservé
+        i = (self.debut + self.n) % self.capacite
+        self.t[i] = horodatage
+        self.x[i], self.y[i] = int(position[0]), int(position[1])
+        if self.n < self.capacite:
+            self.n += 1
+        else:
+            self.debut = (self.debut + 1) % self.capacite
+
+    def indice(self, horodatage):
+        """Indice physique du dernier échantillon pris à horodatage ou avant (O(log n))"""
+        fin = self.debut + self.n
+        # Les données occupent au plus deux tranches contiguës, chacune triée
+        if fin <= self.capacite:
+            tranches = [(self.debut, fin)]
+        else:
+            tranches = [(0, fin - self.capacite), (self.debut, self.capacite)]
+        for a, b in tranches:
+            k = bisect_right(self.t, horodatage, a, b)
+            if k > a:
+                return k - 1
+        return None
+
+    def position_a(self, horodatage):
+        """Position du pointeur à l'instant horodatage
+
+        Le pointeur est immobile entre deux échantillons. Avant le plus ancien
+        échantillon conservé, c'est la plus ancienne position connue.
+        """
+        if not self.n:
+            return None
+        i = self.indice(horodatage)
+        if i is None:
+            i = self.debut
+        return int(self.x[i]), int(self.y[i])
+
+    def derniere(self):
+        if not self.n:
+            return None
+        i = (self.debut + self.n - 1) % self.capacite
+        return int(self.x[i]), int(self.y[i])
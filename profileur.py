@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Profileur du temps de frame, phase par phase.
+
+La boucle principale marque la fin de chaque phase avec profileur.etape(nom)
+et appelle profileur.fin_frame() une fois par frame. N'importe quel module
+peut ajouter ses propres phases avec « with profileur.phase(nom) » (par ex.
+la reconnaissance de gestes) : leur durée est retirée de l'étape englobante.
+F3 affiche l'overlay (barres par phase, percentiles du temps de frame), F4
+exporte un CSV.
+PROFIL_FRAMES=1 active le profileur dès le lancement.
+"""
+
+import os
+import csv
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# --- Constantes ---
+HISTORIQUE = 300            # frames conservées (5 s à 60 fps)
+BUDGET_MS = 1000 / 60       # une frame à 60 fps
+LARGEUR_OVERLAY = 260
+COULEURS_PHASES = [(66, 133, 244), (219, 68, 55), (244, 180, 0), (15, 157, 88),
+                   (171, 71, 188), (0, 172, 193), (255, 112, 67), (158, 157, 36)]
+
+
+def percentile(valeurs, p):
+    if not valeurs:
+        return 0.0
+    triees = sorted(valeurs)
+    return triees[min(len(triees) - 1, int(p / 100 * len(triees)))]
+
+
+class ProfileurFrame:
+    def __init__(self, historique=HISTORIQUE):
+        self.actif = os.environ.get("PROFIL_FRAMES", "0") not in ("", "0")
+        self.historique = historique
+        self.phases = {}            # nom -> deque des durées (ms), ordre d'enregistrement
+        self.frames = deque(maxlen=historique)
+        self.courante = {}
+        self.debut = None
+        self.marque = None          # fin de la dernière étape
+        self.imbrique = 0.0         # durée des phases imbriquées depuis la marque (ms)
+        self.font = None
+
+    def enregistrer_phase(self, nom):
+        """Déclare une phase (pour fixer son ordre dans l'overlay et le CSV)"""
+        if nom not in self.phases:
+            self.phases[nom] = deque(maxlen=self.historique)
+
+    def ajouter(self, nom, duree):
+        self.courante[nom] = self.courante.get(nom, 0.0) + duree
+
+    def etape(self, nom):
+        """Clôt une étape de la boucle (durée depuis la marque précédente)"""
+        if not self.actif or self.marque is None:
+            return
+        maintenant = time.perf_counter()
+        self.ajouter(nom, (maintenant - self.marque) * 1000 - self.imbrique)
+        self.marque = maintenant
+        self.imbrique = 0.0
+
+    @contextmanager
+    def phase(self, nom):
+        """Phase imbriquée, enregistrable depuis n'importe quel module"""
+        if not self.actif:
+            yield
+            return
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = (time.perf_counter() - debut) * 1000
+            self.ajouter(nom, duree)
+            self.imbrique += duree
+
+    def fin_frame(self):
+        """À appeler une fois par frame : enregistre les durées de la frame écoulée"""
+        maintenant = time.perf_counter()
+        if self.actif and self.debut is not None:
+            for nom in self.courante:
+                self.enregistrer_phase(nom)
+            for nom, durees in self.phases.items():
+                durees.append(self.courante.get(nom, 0.0))
+            self.frames.append((maintenant - self.debut) * 1000)
+        self.courante = {}
+        self.debut = self.marque = maintenant
+        self.imbrique = 0.0
+
+    def basculer(self):
+        self.actif = not self.actif
+        self.debut = None
+        print(f"[Profil] {'activé' if self.actif else 'désactivé'}")
+
+    def exporter_csv(self, chemin=None):
+        """Écrit une ligne par frame : total puis chaque phase (ms)"""
+        chemin = chemin or time.strftime("profil_%Y%m%d_%H%M%S.csv")
+        noms = list(self.phases)
+        with open(chemin, "w", newline="") as f:
+            ecrivain = csv.writer(f)
+            ecrivain.writerow(["frame", "total_ms"] + noms)
+            n = len(self.frames)
+            for i, total in enumerate(self.frames):
+                ligne = [i, f"{total:.3f}"]
+                for nom in noms:
+                    durees = self.phases[nom]
+                    # Les phases enregistrées tardivement ont un historique plus court
+                    j = i - (n - len(durees))
+                    ligne.append(f"{durees[j]:.3f}" if j >= 0 else "")
+                ecrivain.writerow(ligne)
+        print(f"[Profil] {len(self.frames)} frames exportées dans {chemin}")
+        return chemin
+
+    def dessiner(self, screen):
+        """Overlay : percentiles du temps de frame et barre moyenne par phase ; renvoie sa zone"""
+        if not self.actif or not self.frames:
+            return
+        import pygame
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.SysFont('Arial', 12)
+
+        hauteur = 52 + 16 * len(self.phases)
+        x = screen.get_width() - LARGEUR_OVERLAY - 10
+        fond = pygame.Surface((LARGEUR_OVERLAY, hauteur), pygame.SRCALPHA)
+        fond.fill((0, 0, 0, 170))
+        zone = screen.blit(fond, (x, 10))
+
+        frames = list(self.frames)
+        texte = (f"frame p50 {percentile(frames, 50):.1f}  p95 {percentile(frames, 95):.1f}  "
+                 f"p99 {percentile(frames, 99):.1f}  max {max(frames):.1f} ms")
+        screen.blit(self.font.render(texte, True, (255, 255, 255)), (x + 6, 16))
+        lentes = sum(1 for t in frames if t > BUDGET_MS * 1.5)
+        screen.blit(self.font.render(f"{len(frames)} frames, {lentes} > {BUDGET_MS * 1.5:.0f} ms",
+                                     True, (200, 200, 200)), (x + 6, 32))
+
+        y = 52
+        largeur_barre = LARGEUR_OVERLAY - 130
+        for i, (nom, durees) in enumerate(self.phases.items()):
+            moyenne = sum(durees) / len(durees) if durees else 0.0
+            couleur = COULEURS_PHASES[i % len(COULEURS_PHASES)]
+            longueur = int(min(1.0, moyenne / BUDGET_MS) * largeur_barre)
+            screen.blit(self.font.render(f"{nom[:14]:14s}", True, couleur), (x + 6, y))
+            pygame.draw.rect(screen, couleur, (x + 92, y + 3, max(1, longueur), 9))
+            screen.blit(self.font.render(f"{moyenne:.2f}", True, (255, 255, 255)),
+                        (x + 96 + largeur_barre, y))
+            y += 16
+        return zone
+
+    def gerer_touche(self, key):
+        """F3 : afficher/masquer, F4 : export CSV. Renvoie True si la touche est traitée"""
+        import pygame
+        if key == pygame.K_F3:
+            self.basculer()
+            return True
+        if key == pygame.K_F4:
+            self.exporter_csv()
+            return True
+        return False
+
+
+# Profileur partagé par les modules d'une même application
+profileur = ProfileurFrame()
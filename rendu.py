@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Rendu par calques : fond statique en cache, formes mobiles, HUD.
+
+Pendant un drag (fusion.py) ou un déplacement « déplace ça ici »
+(palette.py), seules une ou deux formes bougent. Les formes immobiles sont
+dessinées une fois dans une surface de fond, recomposée uniquement quand
+l'ensemble statique change (clé fournie par l'appelant). Chaque frame est
+alors un blit du fond, puis les formes mobiles et le HUD dessinés par
+l'appelant : le temps de frame d'un drag ne dépend plus de la taille de
+la scène.
+
+RENDU_8BITS=1 dessine le fond dans une surface 8 bits à palette : chaque
+forme y est tracée avec l'indice de sa couleur (PaletteIndexee), les
+remplissages touchent un octet par pixel au lieu de quatre, et la
+conversion au format de l'écran n'a lieu qu'au blit. Avec regions=True,
+l'appelant déclare (marquer) les zones qu'il dessine par-dessus le fond ;
+à la frame suivante seules ces zones sont restaurées (et converties), et
+non tout l'écran.
+
+TamponIds est le tampon de sélection hors écran : chaque forme y est
+rastérisée avec sa géométrie exacte et son id comme couleur ; désigner la
+forme visible sous le pointeur revient à lire un pixel.
+"""
+
+import os
+from threading import Lock
+
+import pygame
+
+# --- Constantes ---
+RENDU_8BITS = os.environ.get("RENDU_8BITS", "0") not in ("", "0")
+TAILLE_PALETTE = 256
+
+
+class PaletteIndexee:
+    """Couleurs du canevas, désignées par leur indice (256 au plus)
+
+    La table ne fait que grandir : un indice reste valable pour toute la
+    session. Au-delà de 256 couleurs, la plus proche est utilisée.
+    """
+
+    def __init__(self, couleurs=()):
+        self.couleurs = []
+        self.indices = {}           # (r, g, b) -> indice
+        for couleur in couleurs:
+            self.indice(couleur)
+
+    def __len__(self):
+        return len(self.couleurs)
+
+    def indice(self, couleur):
+        couleur = tuple(couleur[:3])
+        i = self.indices.get(couleur)
+        if i is not None:
+            return i
+        if len(self.couleurs) >= TAILLE_PALETTE:
+            return min(range(len(self.couleurs)),
+                       key=lambda k: sum((a - b) ** 2 for a, b in zip(self.couleurs[k], couleur)))
+        i = self.indices[couleur] = len(self.couleurs)
+        self.couleurs.append(couleur)
+        return i
+
+    def appliquer(self, surface):
+        surface.set_palette(self.couleurs + [(0, 0, 0)] * (TAILLE_PALETTE - len(self.couleurs)))
+
+
+class RenduCalques:
+    def __init__(self, taille, couleur_fond, huit_bits=RENDU_8BITS, couleurs=(), regions=False):
+        self.taille = taille
+        self.couleur_fond = couleur_fond
+        self.fond = None
+        self.cle = None
+        self.reconstructions = 0    # nombre de recompositions du fond (diagnostic)
+        # Mode 8 bits : palette commune au fond et aux formes
+        self.palette = PaletteIndexee([couleur_fond, *couleurs]) if huit_bits else None
+        self.couleurs_appliquees = 0
+        # Zones dessinées par-dessus le fond depuis le dernier composer()
+        self.regions = regions
+        self.zones = []
+        self.complet = True         # prochaine frame : fond blitté sur tout l'écran
+
+    def composer(self, screen, formes, cle, exclues=(), cle_forme=id):
+        """Blitte le fond statique (formes sauf exclues) sur screen
+
+        cle : valeur qui change dès que l'ensemble statique change (version
+        de la scène hors drag, nombre de formes...). exclues : identifiants
+        cle_forme(forme) des formes mobiles, que l'appelant dessine lui-même.
+        """
+        exclues = frozenset(exclues)
+        if self.fond is None or (cle, exclues) != self.cle:
+            if self.fond is None:
+                self.fond = self.creer_fond()
+            self.dessiner_fond([forme for forme in formes
+                                if not exclues or cle_forme(forme) not in exclues])
+            self.cle = (cle, exclues)
+            self.reconstructions += 1
+            self.complet = True
+        if self.complet or not self.regions:
+            screen.blit(self.fond, (0, 0))
+        else:
+            # Seules les zones recouvertes à la frame précédente sont restaurées
+            for zone in self.zones:
+                screen.blit(self.fond, zone, zone)
+        self.complet = False
+        self.zones = []
+
+    def marquer(self, *zones):
+        """Zones dessinées par-dessus le fond pendant cette frame (mode regions)"""
+        self.zones.extend(zone for zone in zones if zone)
+
+    def creer_fond(self):
+        if self.palette:
+            return pygame.Surface(self.taille, depth=8)
+        return pygame.Surface(self.taille).convert() if pygame.display.get_surface() \
+            else pygame.Surface(self.taille)
+
+    def dessiner_fond(self, formes):
+        if not self.palette:
+            self.fond.fill(self.couleur_fond)
+            for forme in formes:
+                forme.draw(self.fond)
+            return
+        # Indices d'abord : la palette de la surface est complétée avant le tracé
+        indices = [self.palette.indice(forme.color) for forme in formes]
+        if len(self.palette) != self.couleurs_appliquees:
+            self.palette.appliquer(self.fond)
+            self.couleurs_appliquees = len(self.palette)
+        self.fond.fill(self.palette.indice(self.couleur_fond))
+        for forme, indice in zip(formes, indices):
+            tracer = getattr(forme, "tracer", None)
+            if tracer:
+                tracer(self.fond, indice)
+            else:
+                forme.draw(self.fond)   # couleur RGB, déjà présente dans la palette
+
+    def invalider(self):
+        self.cle = None
+        self.complet = True
+
+
+class TamponIds:
+    """Tampon de sélection : un pixel = id de la forme visible (0 = aucune)
+
+    Les formes doivent fournir tracer(surface, couleur) -> Rect. Le tampon
+    est mis à jour de façon incrémentale : seules les zones des formes
+    modifiées (ancienne et nouvelle position) sont effacées puis redessinées,
+    dans l'ordre d'affichage. Au-delà de MAX_INCREMENTAL formes modifiées,
+    il est reconstruit entièrement.
+
+    Le thread de fusion écrit le tampon pendant que la boucle d'affichage le
+    lit (début de drag) : écritures et lectures passent par un verrou, sans
+    quoi une lecture entre l'effacement d'une zone et son nouveau tracé
+    renverrait 0.
+    """
+    MAX_INCREMENTAL = 64
+
+    def __init__(self, taille):
+        self.surface = pygame.Surface(taille, depth=32)
+        self.surface.fill(0)
+        self.rects = {}             # id -> rectangle couvert par la forme
+        self.verrou = Lock()
+
+    def reconstruire(self, formes):
+        with self.verrou:
+            self.retracer(formes)
+
+    def retracer(self, formes):
+        self.surface.set_clip(None)
+        self.surface.fill(0)
+        self.rects = {forme.id: forme.tracer(self.surface, forme.id) for forme in formes}
+
+    def mettre_a_jour(self, formes, ids):
+        """Reporte les changements des formes ids (créées, déplacées, supprimées)"""
+        if not ids:
+            return
+        with self.verrou:
+            if len(ids) > self.MAX_INCREMENTAL:
+                self.retracer(formes)
+            else:
+                self.retracer_zones(formes, ids)
+
+    def retracer_zones(self, formes, ids):
+        zones = [self.rects.pop(forme_id) for forme_id in ids if forme_id in self.rects]
+        modifiees = [forme for forme in formes if forme.id in ids]
+        for forme in modifiees:
+            # Tracé provisoire pour connaître la zone de la nouvelle position
+            self.rects[forme.id] = forme.tracer(self.surface, forme.id)
+            zones.append(self.rects[forme.id])
+        for zone in zones:
+            self.surface.set_clip(zone)
+            self.surface.fill(0)
+            for forme in formes:
+                rect = self.rects.get(forme.id)
+                if rect and rect.colliderect(zone):
+                    forme.tracer(self.surface, forme.id)
+        self.surface.set_clip(None)
+
+    def id_a(self, position):
+        """Id de la forme visible à position (lecture d'un pixel), 0 si aucune"""
+        x, y = int(position[0]), int(position[1])
+        if not (0 <= x < self.surface.get_width() and 0 <= y < self.surface.get_height()):
+            return 0
+        with self.verrou:
+            return self.surface.get_at_mapped((x, y)) & 0xFFFFFF
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Index de la scène et service de requêtes sur le bus Ivy.
+
+Les outils externes (tableaux de bord, visionneur Java, bancs de test)
+interrogent le moteur de fusion sans regarder l'écran :
+
+    FusionQuery id=7 count                  -> FusionReply id=7 count n=12
+    FusionQuery id=7 count type=CIRCLE      -> FusionReply id=7 count n=3
+    FusionQuery id=7 count color=RED        -> FusionReply id=7 count n=2
+    FusionQuery id=7 count by=type          -> FusionReply id=7 count CIRCLE=3 RECTANGLE=9
+    FusionQuery id=7 in 0 0 400 300         -> FusionReply id=7 in n=2 ids=3,8
+    FusionQuery id=7 nearest 120 310        -> FusionReply id=7 nearest id=3 type=CIRCLE x=120 y=300 color=ff0000 d=10
+    (requête invalide)                      -> FusionReply id=7 error ...
+
+IndexScene observe le DialogueController et tient à jour, à chaque
+mutation, des compteurs par type et par couleur et une grille spatiale
+(cases de TAILLE_CASE px) : une requête ne parcourt jamais la liste des
+formes. Les requêtes sont limitées aux cases occupées (rectangle englobant
+de la grille) : leur coût ne dépend pas des coordonnées demandées, et une
+requête plus étendue que la grille parcourt simplement les cases occupées.
+Les requêtes sont servies dans le thread d'Ivy, sous un verrou que le
+thread de fusion ne prend que le temps d'une mise à jour : ni la boucle
+d'affichage ni la fusion n'attendent les requêtes.
+"""
+
+import math
+from collections import Counter
+from threading import Lock
+
+from diffusion import couleur_hex
+
+# --- Constantes ---
+TAILLE_CASE = 64            # côté (px) d'une case de la grille spatiale
+MAX_IDS = 200               # ids renvoyés au plus par une requête « in »
+
+
+class IndexScene:
+    """Observateur du DialogueController : compteurs et grille spatiale
+
+    couleur(nom) convertit une couleur de requête (RED, ff0000) en RGB.
+    """
+
+    def __init__(self, controller, couleur, taille_case=TAILLE_CASE):
+        self.couleur = couleur
+        self.taille_case = taille_case
+        self.verrou = Lock()
+        self.formes = {}            # id -> (type, x, y, couleur hexadécimale)
+        self.par_type = Counter()
+        self.par_couleur = Counter()
+        self.grille = {}            # (cx, cy) -> set des ids
+        self.etendue = None         # (cx min, cy min, cx max, cy max) des cases occupées, en cache
+        self.requetes = 0
+        with self.verrou:
+            for forme in controller.formes:
+                self.indexer(forme)
+        controller.ajouter_observateur(self.on_changement)
+
+    # --- Mise à jour (thread de fusion) ---
+    def case(self, x, y):
+        return int(x) // self.taille_case, int(y) // self.taille_case
+
+    def retirer(self, forme_id):
+        entree = self.formes.pop(forme_id, None)
+        if entree is None:
+            return
+        type_forme, x, y, couleur = entree
+        self.par_type[type_forme] -= 1
+        self.par_couleur[couleur] -= 1
+        case = self.grille.get(self.case(x, y))
+        if case is not None:
+            case.discard(forme_id)
+            if not case:
+                del self.grille[self.case(x, y)]
+                self.etendue = None
+
+    def indexer(self, forme):
+        self.retirer(forme.id)
+        entree = (forme.get_type(), int(forme.x), int(forme.y), couleur_hex(forme.color))
+        self.formes[forme.id] = entree
+        self.par_type[entree[0]] += 1
+        self.par_couleur[entree[3]] += 1
+        case = self.case(entree[1], entree[2])
+        if case not in self.grille:
+            self.grille[case] = set()
+            self.etendue = None
+        self.grille[case].add(forme.id)
+
+    def on_changement(self, op, forme=None):
+        if op == 'sync':
+            return
+        formes = forme if isinstance(forme, list) else [forme] if forme is not None else []
+        with self.verrou:
+            if op == 'clear':
+                self.formes.clear()
+                self.par_type.clear()
+                self.par_couleur.clear()
+                self.grille.clear()
+                self.etendue = None
+            for f in formes:
+                if op in ('delete', 'delete_many'):
+                    self.retirer(f.id)
+                else:
+                    self.indexer(f)
+
+    # --- Requêtes (thread d'Ivy) ---
+    def compter(self, critere=None):
+        if not critere:
+            return f"count n={len(self.formes)}"
+        cle, _, valeur = critere.partition("=")
+        if cle == "by" and valeur in ("type", "color"):
+            compteur = self.par_type if valeur == "type" else self.par_couleur
+            return "count " + " ".join(f"{k}={n}" for k, n in sorted(compteur.items()) if n)
+        if cle == "type":
+            return f"count n={self.par_type[valeur.upper()]}"
+        if cle == "color":
+            return f"count n={self.par_couleur[couleur_hex(self.couleur(valeur.upper()))]}"
+        raise ValueError(f"critère inconnu : {critere}")
+
+    def bornes(self):
+        """Rectangle englobant des cases occupées (la grille ne doit pas être vide)"""
+        if self.etendue is None:
+            colonnes = [cx for cx, _ in self.grille]
+            lignes = [cy for _, cy in self.grille]
+            self.etendue = (min(colonnes), min(lignes), max(colonnes), max(lignes))
+        return self.etendue
+
+    def dans(self, x1, y1, x2, y2):
+        x1, x2 = sorted((x1, x2))
+        y1, y2 = sorted((y1, y2))
+        ids = []
+        if self.grille:
+            (c1, l1), (c2, l2) = self.case(x1, y1), self.case(x2, y2)
+            bx1, by1, bx2, by2 = self.bornes()
+            c1, l1, c2, l2 = max(c1, bx1), max(l1, by1), min(c2, bx2), min(l2, by2)
+            if (c2 - c1 + 1) * (l2 - l1 + 1) > len(self.grille):
+                # Plus de cases dans le rectangle que de cases occupées
+                cases = (ids_case for (cx, cy), ids_case in self.grille.items()
+                         if c1 <= cx <= c2 and l1 <= cy <= l2)
+            else:
+                cases = (self.grille.get((cx, cy), ()) for cx in range(c1, c2 + 1)
+                         for cy in range(l1, l2 + 1))
+            for ids_case in cases:
+                for forme_id in ids_case:
+                    _, x, y, _ = self.formes[forme_id]
+                    if x1 <= x <= x2 and y1 <= y <= y2:
+                        ids.append(forme_id)
+        ids.sort()
+        return f"in n={len(ids)} ids=" + ",".join(map(str, ids[:MAX_IDS]))
+
+    def anneau(self, cx, cy, rayon):
+        """Cases à rayon cases (Chebyshev) de (cx, cy), limitées aux cases occupées"""
+        bx1, by1, bx2, by2 = self.bornes()
+        if rayon == 0:
+            yield cx, cy
+            return
+        for j in (cy - rayon, cy + rayon):
+            if by1 <= j <= by2:
+                for i in range(max(cx - rayon, bx1), min(cx + rayon, bx2) + 1):
+                    yield i, j
+        for i in (cx - rayon, cx + rayon):
+            if bx1 <= i <= bx2:
+                for j in range(max(cy - rayon + 1, by1), min(cy + rayon - 1, by2) + 1):
+                    yield i, j
+
+    def comparer(self, ids_case, x, y, meilleur, distance):
+        """(id, distance) de la plus proche entre meilleur et les formes de ids_case"""
+        for forme_id in ids_case:
+            d = math.dist((x, y), self.formes[forme_id][1:3])
+            if d < distance or (d == distance and forme_id < meilleur):
+                meilleur, distance = forme_id, d
+        return meilleur, distance
+
+    def plus_proche(self, x, y):
+        """Forme dont le centre est le plus proche : anneaux de cases autour de (x, y)
+
+        Les anneaux commencent à la première case occupée et s'arrêtent à la
+        dernière ; si la grille est clairsemée (rectangle englobant bien plus
+        grand que le nombre de cases occupées), les cases occupées sont
+        parcourues directement.
+        """
+        if not self.formes:
+            return "nearest none"
+        cx, cy = self.case(x, y)
+        bx1, by1, bx2, by2 = self.bornes()
+        meilleur, distance = None, math.inf
+        if (bx2 - bx1 + 1) * (by2 - by1 + 1) > 4 * len(self.grille):
+            for ids_case in self.grille.values():
+                meilleur, distance = self.comparer(ids_case, x, y, meilleur, distance)
+        else:
+            debut = max(bx1 - cx, cx - bx2, by1 - cy, cy - by2, 0)
+            fin = max(cx - bx1, bx2 - cx, cy - by1, by2 - cy)
+            for rayon in range(debut, fin + 1):
+                for case in self.anneau(cx, cy, rayon):
+                    meilleur, distance = self.comparer(self.grille.get(case, ()), x, y, meilleur, distance)
+                # Toute forme d'un anneau plus lointain est à plus de rayon cases
+                if meilleur is not None and distance <= rayon * self.taille_case:
+                    break
+        type_forme, fx, fy, couleur = self.formes[meilleur]
+        return f"nearest id={meilleur} type={type_forme} x={fx} y={fy} color={couleur} d={distance:.0f}"
+
+    def repondre(self, requete_id, op, arguments=""):
+        """Réponse complète à une requête FusionQuery"""
+        arguments = arguments.split()
+        try:
+            with self.verrou:
+                self.requetes += 1
+                if op == "count" and len(arguments) <= 1:
+                    reponse = self.compter(arguments[0] if arguments else None)
+                elif op == "in" and len(arguments) == 4:
+                    reponse = self.dans(*map(int, arguments))
+                elif op == "nearest" and len(arguments) == 2:
+                    reponse = self.plus_proche(*map(int, arguments))
+                else:
+                    raise ValueError(f"requête inconnue : {op} {' '.join(arguments)}")
+        except ValueError as e:
+            reponse = f"error {e}"
+        return f"FusionReply id={requete_id} {reponse}"
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""Modules du dépôt importables depuis les tests (modules plats à la racine).
+
+La racine est ajoutée en fin de sys.path : code.py ne doit pas masquer le
+module standard code (importé par pdb).
+"""
+
+import os
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RACINE not in sys.path:
+    sys.path.append(RACINE)
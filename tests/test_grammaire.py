@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Analyse des commandes vocales par le trie compilé depuis la grammaire SRA5"""
+
+import pytest
+
+from grammaire import CommandMatcher, decouper, sans_accents, get_matcher, VARIANTES
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return get_matcher()
+
+
+@pytest.mark.parametrize("phrase, attendu", [
+    ("créer un cercle rouge ici",
+     dict(action="CREATE", where=None, form="CIRCLE", color="RED", localisation="THERE")),
+    ("Créer un cercle de cette couleur là",
+     dict(action="CREATE", where=None, form="CIRCLE", color="SELECT", localisation="THERE")),
+    ("déplace ça là",
+     dict(action="MOVE", where="THIS", form=None, color=None, localisation="THERE")),
+    ("dessine un carré bleu",
+     dict(action="CREATE", where=None, form="RECTANGLE", color="BLUE", localisation=None)),
+    ("", dict(action=None, where=None, form=None, color=None, localisation=None)),
+])
+def test_match(matcher, phrase, attendu):
+    assert matcher.match(phrase) == attendu
+
+
+def test_expression_la_plus_longue(matcher):
+    # « de cette couleur » l'emporte sur ses préfixes
+    assert matcher.scan("de cette couleur") == [("couleur", "SELECT")]
+
+
+def test_variante_sans_accent(matcher):
+    assert matcher.match("creer un rectangle vert")["action"] == "CREATE"
+    assert matcher.match("deplacer ca")["where"] == "THIS"
+
+
+def test_formes_ambigues_sans_accent(matcher):
+    # « la » (article) n'est pas lu comme « là »
+    assert matcher.match("créer la forme")["localisation"] is None
+    assert matcher.match("créer un cercle là")["localisation"] == "THERE"
+
+
+def test_premiere_occurrence_conservee(matcher):
+    resultat = matcher.match("créer un cercle rouge, un rectangle bleu")
+    assert (resultat["form"], resultat["color"]) == ("CIRCLE", "RED")
+
+
+def test_format_sra5(matcher):
+    assert matcher.format(matcher.match("créer un cercle rouge ici")) == \
+        "action=CREATE where=undefined form=CIRCLE color=RED localisation=THERE"
+    assert matcher.format(matcher.match("")).startswith("action=none ")
+
+
+def test_valeur(matcher):
+    assert matcher.valeur("forme", "triangle") == "TRIANGLE"
+    assert matcher.valeur("action", "cercle") is None
+
+
+def test_vocabulaire_supplementaire():
+    matcher = CommandMatcher(extra={"forme": {"étoile filante": "STAR"}})
+    assert matcher.match("dessiner une étoile filante")["form"] == "STAR"
+    assert matcher.match("dessiner une etoile filante")["form"] == "STAR"
+    assert "carré" not in [e for e, _ in matcher.vocabulaire["forme"]]
+    assert VARIANTES["forme"]["carré"] == "RECTANGLE"
+
+
+def test_outils():
+    assert decouper("Créer, un CERCLE !") == ["créer", "un", "cercle"]
+    assert decouper(None) == []
+    assert sans_accents("déplacer ça là") == "deplacer ca la"
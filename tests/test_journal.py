@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Journal : inverses, annulation / rétablissement, reprise depuis le disque"""
+
+import os
+
+import pytest
+
+from journal import Journal, inverser, appliquer
+from noyau_fusion import DialogueController
+
+ENTREES = [
+    {"op": "create", "formes": [[3, "CIRCLE", 120, 300, [255, 0, 0]]]},
+    {"op": "delete", "formes": [[3, "CIRCLE", 400, 80, [255, 0, 0]]]},
+    {"op": "move", "id": 3, "de": [120, 300], "vers": [400, 80]},
+    {"op": "move_many", "formes": [[3, [120, 300], [410, 90]], [4, [10, 10], [20, 20]]]},
+    {"op": "recolour", "formes": [[3, [255, 0, 0], [0, 0, 255]]]},
+]
+
+
+def scene(controller):
+    return sorted((f.id, f.get_type(), f.x, f.y, tuple(f.color)) for f in controller.formes)
+
+
+def ouvrir(dossier, **options):
+    """Contrôleur neuf avec son journal repris depuis dossier"""
+    controller = DialogueController()
+    journal = Journal(controller, str(dossier), intervalle=0.01, **options)
+    journal.recuperer()
+    return controller, journal
+
+
+def session(controller):
+    """Une commande de chaque sorte, directement sur le contrôleur"""
+    controller.create_many([("CIRCLE", 100, 100, "RED"), ("RECTANGLE", 200, 100, "BLUE"),
+                            ("TRIANGLE", 300, 100, "00ff00")])
+    controller.traiter('drag', (1, (150, 160)))
+    controller.traiter('drop', 1)
+    controller.translate_many(10, -5, [2, 3])
+    controller.recolour_many({2: "YELLOW"})
+    controller.delete_many([3])
+
+
+@pytest.mark.parametrize("entree", ENTREES, ids=lambda e: e["op"])
+def test_inverse_involutif(entree):
+    assert inverser(inverser(entree)) == entree
+
+
+@pytest.mark.parametrize("entree", ENTREES[2:], ids=lambda e: e["op"])
+def test_appliquer_puis_inverse(entree):
+    controller = DialogueController()
+    controller.restaurer_formes([[3, "CIRCLE", 120, 300, [255, 0, 0]],
+                                 [4, "RECTANGLE", 10, 10, [0, 0, 0]]])
+    avant = scene(controller)
+    appliquer(controller, entree)
+    assert scene(controller) != avant
+    appliquer(controller, inverser(entree))
+    assert scene(controller) == avant
+
+
+def test_annuler_tout_puis_retablir(tmp_path):
+    controller, journal = ouvrir(tmp_path)
+    etats = [scene(controller)]
+    session(controller)
+    assert len(journal.annulables) == 5
+    # Une entrée par commande : chaque état intermédiaire est retrouvé à l'annulation
+    final = scene(controller)
+    for _ in range(5):
+        journal.annuler()
+    assert scene(controller) == etats[0]
+    journal.annuler()  # rien à annuler
+    for _ in range(5):
+        journal.retablir()
+    assert scene(controller) == final
+    journal.fermer()
+
+
+def test_nouvelle_commande_vide_retablissables(tmp_path):
+    controller, journal = ouvrir(tmp_path)
+    controller.create_many([("CIRCLE", 100, 100, "RED")])
+    controller.move_many({1: (50, 50)})
+    journal.annuler()
+    assert journal.retablissables
+    controller.move_many({1: (70, 70)})
+    assert not journal.retablissables
+    journal.retablir()  # rien à rétablir
+    assert scene(controller)[0][2:4] == (70, 70)
+    journal.fermer()
+
+
+def test_annulation_non_rejournalisee(tmp_path):
+    controller, journal = ouvrir(tmp_path)
+    controller.create_many([("CIRCLE", 100, 100, "RED")])
+    journal.annuler()
+    assert not journal.annulables
+    assert not controller.formes
+
+
+def test_reprise(tmp_path):
+    controller, journal = ouvrir(tmp_path)
+    session(controller)
+    attendu = scene(controller)
+    journal.fermer()
+
+    reprise, journal = ouvrir(tmp_path)
+    assert scene(reprise) == attendu
+    # Les ids ne sont pas réutilisés et les commandes rejouées restent annulables
+    assert reprise.prochain_id == 4
+    journal.annuler()
+    assert len(reprise.formes) == 3
+    journal.fermer()
+
+
+def test_reprise_apres_checkpoints_et_compactage(tmp_path):
+    controller, journal = ouvrir(tmp_path, checkpoint_tous=3)
+    session(controller)
+    session_ids = controller.prochain_id
+    controller.create_many([("DIAMOND", x, 400, "RED") for x in range(0, 500, 50)])
+    controller.translate_many(1, 1)
+    attendu = scene(controller)
+    journal.fermer()
+
+    checkpoints = journal.numeros("checkpoint", "json")
+    assert len(checkpoints) == 2
+    assert min(journal.numeros("segment", "jsonl")) >= checkpoints[0]
+
+    reprise, journal = ouvrir(tmp_path, checkpoint_tous=3)
+    assert scene(reprise) == attendu
+    assert reprise.prochain_id == session_ids + 10
+    journal.fermer()
+
+
+def test_ligne_tronquee_ignoree(tmp_path):
+    controller, journal = ouvrir(tmp_path)
+    controller.create_many([("CIRCLE", 100, 100, "RED")])
+    controller.move_many({1: (50, 50)})
+    attendu = scene(controller)
+    journal.fermer()
+
+    dernier = journal.chemin("segment", journal.numeros("segment", "jsonl")[-1], "jsonl")
+    with open(dernier, "a") as f:
+        f.write('{"op": "move", "id": 1, "de": [50, 5')
+
+    reprise, journal = ouvrir(tmp_path)
+    assert scene(reprise) == attendu
+    journal.fermer()
+
+
+def test_checkpoint_corrompu(tmp_path):
+    controller, journal = ouvrir(tmp_path, checkpoint_tous=2)
+    session(controller)
+    attendu = scene(controller)
+    journal.fermer()
+
+    dernier = journal.chemin("checkpoint", journal.numeros("checkpoint", "json")[-1], "json")
+    with open(dernier, "w") as f:
+        f.write('{"formes": [[1, "CIR')
+
+    # Le checkpoint précédent et les segments qui le suivent redonnent la scène
+    reprise, journal = ouvrir(tmp_path, checkpoint_tous=2)
+    assert scene(reprise) == attendu
+    journal.fermer()
+
+
+def test_dossier_vide(tmp_path):
+    controller, journal = ouvrir(tmp_path / "journal")
+    assert controller.formes == []
+    assert controller.prochain_id == 1
+    journal.fermer()
+    assert sorted(os.listdir(tmp_path / "journal")) == ["checkpoint_000001.json", "segment_000001.jsonl"]
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Décodage des messages FusionBatch et robustesse du thread de fusion"""
+
+import time
+from queue import Queue
+
+import pytest
+
+from noyau_fusion import DialogueController, lire_lot, couleur_depuis, COLORS, DEFAULT_COLOR
+
+
+def test_lire_create():
+    assert lire_lot('create', "CIRCLE,100,200,RED;RECTANGLE,300,200,00ff00") == [
+        ("CIRCLE", 100, 200, COLORS["RED"]), ("RECTANGLE", 300, 200, (0, 255, 0))]
+
+
+def test_lire_move_translate_recolour_delete():
+    assert lire_lot('move', "3,120,300;4,130,310") == {3: (120, 300), 4: (130, 310)}
+    assert lire_lot('translate', "10,-5 3,4") == (10, -5, [3, 4])
+    assert lire_lot('translate', "10,-5") == (10, -5, None)
+    assert lire_lot('recolour', "ff0000 3,4") == {3: (255, 0, 0), 4: (255, 0, 0)}
+    assert lire_lot('delete', "3,4,5") == [3, 4, 5]
+
+
+@pytest.mark.parametrize("op, payload", [
+    ('create', ""),
+    ('create', "CIRCLE,100,200"),
+    ('create', "CIRCLE,100,200,RED,5"),
+    ('create', "CIRCLE,cent,200,RED"),
+    ('create', "CIRCLE,100,200,RED;"),
+    ('move', "3,120"),
+    ('move', "3,120,300,7"),
+    ('move', "3,x,300"),
+    ('translate', ""),
+    ('translate', "10"),
+    ('translate', "10,-5 3,4 5"),
+    ('translate', "10,-5 3,,4"),
+    ('recolour', "RED"),
+    ('recolour', "RED 3 4"),
+    ('recolour', "RED 3,a"),
+    ('delete', ""),
+    ('delete', "3;4"),
+    ('rotate', "3,90"),
+])
+def test_lot_mal_forme(op, payload):
+    with pytest.raises(ValueError):
+        lire_lot(op, payload)
+
+
+@pytest.mark.parametrize("couleur, attendu", [
+    ("RED", COLORS["RED"]),
+    ("0000ff", (0, 0, 255)),
+    ((1, 2, 3, 255), (1, 2, 3)),
+    ([4, 5, 6], (4, 5, 6)),
+    ("SELECT", DEFAULT_COLOR),
+    ("zzzzzz", DEFAULT_COLOR),
+    ("fff", DEFAULT_COLOR),
+    ("", DEFAULT_COLOR),
+])
+def test_couleur_depuis(couleur, attendu):
+    assert couleur_depuis(couleur) == attendu
+
+
+def test_process_batch(capsys):
+    controller = DialogueController()
+    controller.process_batch('create', "CIRCLE,100,200,RED;HEXAGON,1,1,RED;DIAMOND,5,5,BLUE")
+    assert [(f.id, f.get_type()) for f in controller.formes] == [(1, "CIRCLE"), (2, "DIAMOND")]
+    controller.process_batch('translate', "10,10 2")
+    controller.process_batch('recolour', "00ff00 1,2,99")
+    assert [(f.x, f.y, f.color) for f in controller.formes] == [
+        (100, 200, (0, 255, 0)), (15, 15, (0, 255, 0))]
+    # Un lot invalide n'applique rien
+    controller.process_batch('move', "1,0,0;2,0")
+    assert (controller.formes[0].x, controller.formes[0].y) == (100, 200)
+    controller.process_batch('delete', "1")
+    assert [f.id for f in controller.formes] == [2]
+    assert "Lot invalide (move)" in capsys.readouterr().out
+
+
+def test_thread_survit_aux_lots_invalides():
+    controller = DialogueController()
+    notifications = []
+    controller.ajouter_observateur(lambda op, forme: notifications.append(op))
+    file = Queue()
+    controller.demarrer(file)
+    for message in [('batch', ('create', "CIRCLE,1")),
+                    ('batch', ('rotate', "1,90")),
+                    ('batch', "create"),           # données non décomposables
+                    ('batch', ('create', None)),   # charge absente
+                    ('batch', ('create', "CIRCLE,100,200,RED"))]:
+        file.put(message)
+    limite = time.monotonic() + 5
+    while not controller.scene.formes and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert controller.thread.is_alive()
+    assert [f.get_type() for f in controller.scene.formes] == ["CIRCLE"]
+    assert notifications == ['create_many']
+    controller.arreter()
+    controller.thread.join(timeout=5)
+    assert not controller.thread.is_alive()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Tampon circulaire de l'historique du pointeur"""
+
+import random
+
+import pytest
+
+from pointeur import HistoriquePointeur
+
+
+def rempli(capacite, n):
+    """Historique avec les échantillons k = 0..n-1 en (k, 2k) à t = k"""
+    historique = HistoriquePointeur(capacite)
+    for k in range(n):
+        historique.ajouter(float(k), (k, 2 * k))
+    return historique
+
+
+def test_vide():
+    historique = HistoriquePointeur(4)
+    assert len(historique) == 0
+    assert historique.position_a(1.0) is None
+    assert historique.derniere() is None
+
+
+def test_pointeur_immobile_entre_echantillons():
+    historique = rempli(8, 5)
+    assert historique.position_a(2.0) == (2, 4)
+    assert historique.position_a(2.9) == (2, 4)
+    assert historique.position_a(100.0) == (4, 8)
+
+
+@pytest.mark.parametrize("n", [8, 9, 13, 16, 17])
+def test_tampon_plein_circulaire(n):
+    historique = rempli(8, n)
+    assert len(historique) == 8
+    assert historique.derniere() == (n - 1, 2 * (n - 1))
+    # Les échantillons écrasés sont remplacés par la plus ancienne position connue
+    plus_ancien = n - 8
+    assert historique.position_a(0.0) == (plus_ancien, 2 * plus_ancien)
+    for k in range(plus_ancien, n):
+        assert historique.position_a(k + 0.5) == (k, 2 * k)
+
+
+def test_echantillon_en_retard_ignore():
+    historique = rempli(8, 4)
+    historique.ajouter(1.5, (99, 99))
+    assert len(historique) == 4
+    assert historique.position_a(1.7) == (1, 2)
+    assert historique.derniere() == (3, 6)
+    # Même horodatage que le dernier : accepté
+    historique.ajouter(3.0, (7, 7))
+    assert historique.derniere() == (7, 7)
+
+
+def test_contre_recherche_lineaire():
+    aleatoire = random.Random(3)
+    historique = HistoriquePointeur(32)
+    echantillons = []
+    t = 0.0
+    for _ in range(200):
+        t += aleatoire.random()
+        position = (aleatoire.randrange(800), aleatoire.randrange(600))
+        historique.ajouter(t, position)
+        echantillons.append((t, position))
+        conserves = echantillons[-32:]
+        instant = aleatoire.uniform(conserves[0][0] - 1, t + 1)
+        attendu = conserves[0][1]
+        for horodatage, p in conserves:
+            if horodatage <= instant:
+                attendu = p
+        assert historique.position_a(instant) == attendu
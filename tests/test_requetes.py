@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Index de la scène : requêtes count / in / nearest comparées à un parcours complet"""
+
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from diffusion import couleur_hex
+from noyau_fusion import DialogueController, couleur_depuis
+from requetes import IndexScene, MAX_IDS
+
+TYPES = ["CIRCLE", "RECTANGLE", "TRIANGLE", "DIAMOND"]
+COULEURS = ["RED", "BLUE", "GREEN", "ffff00"]
+
+
+def remplir(controller, aleatoire, n, etendue=(0, 0, 1280, 720)):
+    x1, y1, x2, y2 = etendue
+    controller.create_many([(aleatoire.choice(TYPES), aleatoire.randint(x1, x2),
+                             aleatoire.randint(y1, y2), aleatoire.choice(COULEURS))
+                            for _ in range(n)])
+
+
+def reponse(index, op, arguments=""):
+    return index.repondre(7, op, arguments).removeprefix("FusionReply id=7 ")
+
+
+def dans_complet(controller, x1, y1, x2, y2):
+    x1, x2 = sorted((x1, x2))
+    y1, y2 = sorted((y1, y2))
+    ids = sorted(f.id for f in controller.formes if x1 <= f.x <= x2 and y1 <= f.y <= y2)
+    return f"in n={len(ids)} ids=" + ",".join(map(str, ids[:MAX_IDS]))
+
+
+def plus_proche_complet(controller, x, y):
+    forme = min(controller.formes, key=lambda f: (math.dist((x, y), (f.x, f.y)), f.id))
+    d = math.dist((x, y), (forme.x, forme.y))
+    return (f"nearest id={forme.id} type={forme.get_type()} x={forme.x} y={forme.y} "
+            f"color={couleur_hex(forme.color)} d={d:.0f}")
+
+
+@pytest.fixture
+def scene():
+    controller = DialogueController()
+    remplir(controller, random.Random(1), 300)
+    return controller, IndexScene(controller, couleur_depuis)
+
+
+def verifier(controller, index, aleatoire, requetes=200, marge=2000):
+    for _ in range(requetes):
+        x1, x2 = aleatoire.randint(-marge, 1280 + marge), aleatoire.randint(-marge, 1280 + marge)
+        y1, y2 = aleatoire.randint(-marge, 720 + marge), aleatoire.randint(-marge, 720 + marge)
+        assert reponse(index, "in", f"{x1} {y1} {x2} {y2}") == dans_complet(controller, x1, y1, x2, y2)
+        assert reponse(index, "nearest", f"{x1} {y1}") == plus_proche_complet(controller, x1, y1)
+
+
+def test_compter(scene):
+    controller, index = scene
+    assert reponse(index, "count") == f"count n={len(controller.formes)}"
+    types = Counter(f.get_type() for f in controller.formes)
+    assert reponse(index, "count", "type=circle") == f"count n={types['CIRCLE']}"
+    assert reponse(index, "count", "by=type") == "count " + " ".join(
+        f"{k}={n}" for k, n in sorted(types.items()))
+    rouges = sum(1 for f in controller.formes if f.color == couleur_depuis("RED"))
+    assert reponse(index, "count", "color=RED") == f"count n={rouges}"
+    assert reponse(index, "count", "color=ff0000") == f"count n={rouges}"
+
+
+def test_requetes_contre_parcours_complet(scene):
+    controller, index = scene
+    verifier(controller, index, random.Random(2))
+
+
+def test_coordonnees_lointaines(scene):
+    controller, index = scene
+    for x, y in [(10 ** 9, 10 ** 9), (-10 ** 9, 360), (640, -10 ** 9)]:
+        assert reponse(index, "nearest", f"{x} {y}") == plus_proche_complet(controller, x, y)
+    assert reponse(index, "in", "-1000000000 -1000000000 1000000000 1000000000") == \
+        dans_complet(controller, -10 ** 9, -10 ** 9, 10 ** 9, 10 ** 9)
+    assert reponse(index, "in", "5000000 5000000 6000000 6000000") == "in n=0 ids="
+
+
+def test_grille_clairsemee():
+    # Quelques formes très éloignées : rectangle englobant bien plus grand que les cases occupées
+    controller = DialogueController()
+    aleatoire = random.Random(4)
+    remplir(controller, aleatoire, 20, (-10 ** 6, -10 ** 6, 10 ** 6, 10 ** 6))
+    index = IndexScene(controller, couleur_depuis)
+    verifier(controller, index, aleatoire, marge=10 ** 6)
+
+
+def test_mises_a_jour(scene):
+    controller, index = scene
+    aleatoire = random.Random(3)
+    ids = [f.id for f in controller.formes]
+    controller.move_many({i: (aleatoire.randint(-500, 2000), aleatoire.randint(-500, 1500))
+                          for i in aleatoire.sample(ids, 50)})
+    controller.translate_many(40, -30, aleatoire.sample(ids, 50))
+    controller.recolour_many({i: "BLUE" for i in aleatoire.sample(ids, 50)})
+    controller.delete_many(aleatoire.sample(ids, 150))
+    verifier(controller, index, aleatoire)
+    assert reponse(index, "count", "color=BLUE") == \
+        f"count n={sum(1 for f in controller.formes if f.color == couleur_depuis('BLUE'))}"
+
+
+def test_suppression_met_a_jour_les_bornes():
+    controller = DialogueController()
+    controller.create_many([("CIRCLE", 100, 100, "RED"), ("CIRCLE", 5000, 5000, "RED")])
+    index = IndexScene(controller, couleur_depuis)
+    assert reponse(index, "nearest", "6000 6000").startswith("nearest id=2 ")
+    controller.delete_many([2])
+    assert index.bornes() == index.case(100, 100) * 2
+    assert reponse(index, "nearest", "6000 6000").startswith("nearest id=1 ")
+    assert reponse(index, "in", "0 0 10000 10000") == "in n=1 ids=1"
+
+
+def test_scene_vide_et_effacement(scene):
+    controller, index = scene
+    controller.formes = []
+    controller.notifier('clear')
+    assert reponse(index, "count") == "count n=0"
+    assert reponse(index, "in", "0 0 1280 720") == "in n=0 ids="
+    assert reponse(index, "nearest", "10 10") == "nearest none"
+
+
+def test_egalite_plus_petit_id():
+    controller = DialogueController()
+    controller.create_many([("CIRCLE", 110, 100, "RED"), ("CIRCLE", 90, 100, "RED")])
+    index = IndexScene(controller, couleur_depuis)
+    assert reponse(index, "nearest", "100 100").startswith("nearest id=1 ")
+
+
+@pytest.mark.parametrize("op, arguments", [
+    ("count", "shape=CIRCLE"),
+    ("count", "by=size"),
+    ("count", "type=CIRCLE color=RED"),
+    ("in", "0 0 10"),
+    ("in", "0 0 10 dix"),
+    ("nearest", "1.5 2"),
+    ("nearest", ""),
+    ("zoom", "2"),
+])
+def test_requete_invalide(scene, op, arguments):
+    _, index = scene
+    assert index.repondre(7, op, arguments).startswith("FusionReply id=7 error ")
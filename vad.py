@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Détection d'activité vocale (VAD) par énergie et taux de passage par zéro.
+
+Le flux audio est lu par trames fixes (20 ms). Chaque bloc de trames est
+analysé d'un coup avec numpy ; le segmenteur coupe la phrase dès qu'un
+silence final suffisant est détecté, au lieu d'attendre le timeout de
+recognizer.listen(). Seuls les segments voisés sont transmis à la
+reconnaissance.
+"""
+
+from collections import deque
+
+import numpy as np
+
+# --- Constantes ---
+TRAME_MS = 20               # durée d'une trame d'analyse
+CALIBRATION_TRAMES = 15     # trames utilisées pour estimer le bruit de fond
+MARGE_DB = 12.0             # énergie au-dessus du bruit pour une trame voisée
+MARGE_FRICATIVE_DB = 6.0    # marge réduite pour les consonnes sourdes (« ç », « s »)
+ZCR_FRICATIVE = 0.25        # taux de passage par zéro des fricatives
+ENERGIE_MIN_DB = 30.0       # plancher absolu (signal 16 bits)
+
+SILENCE_FIN_MS = 300        # silence final qui termine une phrase
+PAROLE_MIN_MS = 120         # phrases plus courtes ignorées (clics, souffles)
+PRE_ROLL_MS = 200           # audio conservé avant le début détecté
+DUREE_MAX_S = 5.0           # coupure forcée d'une phrase trop longue
+
+
+def taille_trame(frequence, trame_ms=TRAME_MS):
+    """Nombre d'échantillons par trame"""
+    return int(frequence * trame_ms / 1000)
+
+
+# --- Détecteur ---
+class DetecteurActivite:
+    """Classe chaque trame en parole / silence (énergie + ZCR, vectorisé)"""
+
+    def __init__(self, frequence, trame_ms=TRAME_MS):
+        self.frequence = frequence
+        self.n = taille_trame(frequence, trame_ms)
+        self.bruit_db = None
+        self._calibration = []
+
+    def mesurer(self, echantillons):
+        """Énergie (dB) et ZCR de chaque trame complète d'un bloc int16"""
+        nb = len(echantillons) // self.n
+        trames = echantillons[:nb * self.n].reshape(nb, self.n).astype(np.float32)
+        energie = 10.0 * np.log10(np.mean(trames * trames, axis=1) + 1.0)
+        signes = np.signbit(trames)
+        zcr = np.mean(signes[:, 1:] != signes[:, :-1], axis=1)
+        return energie, zcr
+
+    def analyser(self, echantillons):
+        """Renvoie un tableau booléen (une valeur par trame)"""
+        energie, zcr = self.mesurer(echantillons)
+        if self.bruit_db is None:
+            # Calibration sur les premières trames, supposées silencieuses
+            self._calibration.extend(energie.tolist())
+            if len(self._calibration) < CALIBRATION_TRAMES:
+                return np.zeros(len(energie), dtype=bool)
+            self.bruit_db = float(np.median(self._calibration))
+
+        voise = (energie > self.bruit_db + MARGE_DB) | \
+                ((energie > self.bruit_db + MARGE_FRICATIVE_DB) & (zcr > ZCR_FRICATIVE))
+        voise &= energie > ENERGIE_MIN_DB
+
+        # Le bruit de fond suit lentement les trames silencieuses
+        silence = energie[~voise]
+        if len(silence):
+            self.bruit_db = 0.9 * self.bruit_db + 0.1 * float(np.mean(silence))
+        return voise
+
+
+# --- Segmenteur ---
+class Segmenteur:
+    """Assemble les trames voisées en phrases
+
+    ajouter() reçoit des blocs PCM 16 bits mono de taille quelconque et
+    renvoie la liste des phrases terminées : (octets, début, fin).
+    """
+
+    def __init__(self, frequence, trame_ms=TRAME_MS, silence_fin_ms=SILENCE_FIN_MS,
+                 parole_min_ms=PAROLE_MIN_MS, pre_roll_ms=PRE_ROLL_MS, duree_max_s=DUREE_MAX_S):
+        self.frequence = frequence
+        self.trame_s = trame_ms / 1000
+        self.detecteur = DetecteurActivite(frequence, trame_ms)
+        self.silence_fin = max(1, silence_fin_ms // trame_ms)
+        self.parole_min = max(1, parole_min_ms // trame_ms)
+        self.duree_max = int(duree_max_s * 1000 // trame_ms)
+        self.pre_roll = deque(maxlen=max(1, pre_roll_ms // trame_ms))
+        self.reste = np.zeros(0, dtype=np.int16)
+        self.phrase = []            # trames de la phrase en cours
+        self.voisees = 0            # trames voisées dans la phrase
+        self.silence = 0            # trames silencieuses consécutives
+        self.debut = None
+
+    def ajouter(self, bloc, horodatage):
+        """Ajoute un bloc capturé à l'instant horodatage (fin du bloc)"""
+        echantillons = np.concatenate((self.reste, np.frombuffer(bloc, dtype='<i2')))
+        n = self.detecteur.n
+        nb = len(echantillons) // n
+        self.reste = echantillons[nb * n:]
+        if nb == 0:
+            return []
+
+        voise = self.detecteur.analyser(echantillons[:nb * n])
+        # Instant de début de la première trame complète du bloc
+        t0 = horodatage - (len(echantillons) / self.frequence)
+        termines = []
+        for i in range(nb):
+            trame = echantillons[i * n:(i + 1) * n]
+            t = t0 + i * self.trame_s
+            if not self.phrase:
+                if voise[i]:
+                    self.debut = t - len(self.pre_roll) * self.trame_s
+                    self.phrase = list(self.pre_roll) + [trame]
+                    self.pre_roll.clear()
+                    self.voisees, self.silence = 1, 0
+                else:
+                    self.pre_roll.append(trame)
+                continue
+
+            self.phrase.append(trame)
+            if voise[i]:
+                self.voisees += 1
+                self.silence = 0
+            else:
+                self.silence += 1
+            if self.silence >= self.silence_fin or len(self.phrase) >= self.duree_max:
+                segment = self.terminer(t + self.trame_s)
+                if segment:
+                    termines.append(segment)
+        return termines
+
+    def vider(self, fin):
+        """Fin du flux : renvoie la phrase en cours (ou None)"""
+        return self.terminer(fin) if self.phrase else None
+
+    def terminer(self, fin):
+        """Clôt la phrase en cours ; None si elle est trop courte"""
+        phrase, voisees = self.phrase, self.voisees
+        self.phrase, self.voisees, self.silence = [], 0, 0
+        if voisees < self.parole_min:
+            return None
+        return np.concatenate(phrase).tobytes(), self.debut, fin